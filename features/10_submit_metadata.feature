@@ -18,5 +18,13 @@ Feature: 10 Submit Metadata
     When "complete" metadata is submitted to the submission store
     Then two submission JSON files exist in the local submission store
 
+  Scenario: Running the datasteward-kit in the test bed process
+    When the datasteward-kit is run with the "in_process" runner
+    Then the datasteward-kit command succeeds without errors
+
+  Scenario: Running the datasteward-kit in warm worker processes
+    When the datasteward-kit is run with the "worker_pool" runner
+    Then the datasteward-kit command succeeds without errors
+
   Scenario: Finishing the metadata submission
     Then set the state to "metadata submission is completed"
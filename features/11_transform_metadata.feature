@@ -9,3 +9,8 @@ Feature: 11 Transform Metadata
     Then the embedded_public event exists
 
     Then set the state to "metadata transformation is completed"
+
+  Scenario: Reusing a cached transformation
+    Given the transform cache is configured
+    When the same metadata is submitted and transformed twice
+    Then the second transformation is taken from the cache
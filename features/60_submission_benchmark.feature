@@ -0,0 +1,10 @@
+@benchmark @submission
+Feature: 60 Submission Benchmark
+  As a developer, I can see how the metadata submission
+  scales with the size of the submitted metadata
+
+  Scenario: Benchmarking the metadata submission
+    Given benchmarks are enabled
+    When generated metadata of increasing size is submitted
+    Then all generated submissions are in their submission stores
+    And the submission benchmark report is written
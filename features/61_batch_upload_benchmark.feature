@@ -0,0 +1,10 @@
+@benchmark @upload @files
+Feature: 61 Batch Upload Benchmark
+  As a developer, I can find out how many parallel processes
+  give the best throughput when uploading a batch of files
+
+  Scenario: Benchmarking the parallelism of the batch upload
+    Given benchmarks are enabled
+    When the batch of files is uploaded with increasing parallelism
+    Then the batch upload benchmark report is written
+    And a parallelism for the batch upload is recommended
@@ -0,0 +1,10 @@
+@benchmark @upload @files
+Feature: 62 Part Size Benchmark
+  As a developer, I can find out how the part size of multipart uploads
+  affects the throughput and resource usage of file uploads
+
+  Scenario: Benchmarking the part size of file uploads
+    Given benchmarks are enabled
+    When the same file is uploaded with different part sizes
+    Then the part size benchmark report is written
+    And the file was uploaded with every part size
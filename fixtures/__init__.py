@@ -25,11 +25,14 @@ from fixtures.config import Config
 from fixtures.connector import ConnectorFixture, connector_fixture
 from fixtures.dsk import DskFixture, dsk_fixture
 from fixtures.file import batch_file_fixture, file_fixture
+from fixtures.file_cache import FileCache, file_cache_fixture
 from fixtures.http_req import HttpClient, Response, http_fixture
 from fixtures.kafka import KafkaFixture, kafka_fixture
+from fixtures.metadata import MetadataIndex, metadata_index_fixture
 from fixtures.mongo import MongoFixture, mongo_fixture
 from fixtures.s3 import S3Fixture, s3_fixture
 from fixtures.state import StateStorage, state_fixture
+from fixtures.transform_cache import TransformCache, transform_cache_fixture
 from fixtures.vault import VaultFixture, vault_fixture
 
 __all__ = [
@@ -42,14 +45,20 @@ __all__ = [
     "joint_fixture",
     "batch_file_fixture",
     "file_fixture",
+    "file_cache_fixture",
+    "metadata_index_fixture",
     "dsk_fixture",
     "connector_fixture",
     "state_fixture",
+    "transform_cache_fixture",
     "Config",
+    "FileCache",
     "HttpClient",
     "JointFixture",
+    "MetadataIndex",
     "Response",
     "StateStorage",
+    "TransformCache",
     "vault_fixture",
 ]
 
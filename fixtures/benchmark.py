@@ -0,0 +1,98 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Utilities for benchmarking commands run in separate processes"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from time import perf_counter
+from typing import NamedTuple, Optional
+
+__all__ = ["ProcessMeasurement", "dir_size", "measure_process"]
+
+# the maximum resident set size is reported in kilobytes on Linux
+MAX_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+class ProcessMeasurement(NamedTuple):
+    """Outcome and resource usage of a finished process"""
+
+    returncode: int
+    stdout: str
+    stderr: str
+    wall_seconds: float
+    cpu_seconds: float  # user and system time
+    peak_rss: int  # maximum resident set size in bytes
+
+
+def measure_process(
+    command: Sequence[str],
+    cwd: Optional[Path] = None,
+    timeout: Optional[float] = None,
+) -> ProcessMeasurement:
+    """Run the given command and measure its wall time and peak memory usage.
+
+    The resource usage is taken from the exit status of the process itself,
+    so it is not mixed up with that of other child processes of the test bed.
+    The output is collected in temporary files, since the process must not be
+    reaped before its resource usage has been retrieved.
+    """
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        start = perf_counter()
+        process = subprocess.Popen(  # nosec B603
+            command,  # noqa: S603
+            cwd=cwd,
+            stdout=stdout,
+            stderr=stderr,
+        )
+        timed_out = threading.Event()
+
+        def kill() -> None:
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        finally:
+            if timer:
+                timer.cancel()
+        wall_seconds = perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(command, timeout or 0)
+        stdout.seek(0)
+        stderr.seek(0)
+        return ProcessMeasurement(
+            returncode=process.returncode,
+            stdout=stdout.read().decode("utf-8"),
+            stderr=stderr.read().decode("utf-8"),
+            wall_seconds=wall_seconds,
+            cpu_seconds=usage.ru_utime + usage.ru_stime,
+            peak_rss=usage.ru_maxrss * MAX_RSS_UNIT,
+        )
+
+
+def dir_size(path: Path) -> int:
+    """Get the total size of all files in the given directory in bytes."""
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
@@ -17,6 +17,7 @@
 """The configuration for the test app."""
 
 from pathlib import Path
+from typing import Literal, Optional
 
 from hexkit.config import config_from_yaml
 from hexkit.providers.akafka import KafkaConfig
@@ -24,6 +25,10 @@ from hexkit.providers.mongodb import MongoDbConfig
 from hexkit.providers.s3 import S3Config
 from pydantic import Field, SecretStr, model_validator
 
+ContentProfile = Literal["zeros", "random", "fastq", "vcf", "formatted"]
+SizeProfile = Literal["metadata", "lognormal", "mixed", "formatted"]
+DskRunnerMode = Literal["subprocess", "in_process", "worker_pool"]
+
 
 @config_from_yaml(prefix="tb")
 class Config(KafkaConfig, MongoDbConfig, S3Config):
@@ -44,11 +49,50 @@ class Config(KafkaConfig, MongoDbConfig, S3Config):
     base_dir: Path = Path(__file__).parent.parent
     data_dir: Path = base_dir / "example_data"
     test_dir: Path = base_dir / "test_data"
+    report_dir: Path = test_dir / "reports"
+    scratch_dir: Optional[Path] = None  # working directory for scratch files
+    scratch_in_memory: bool = False  # keep scratch files in a tmpfs
+    scratch_budget: Optional[int] = None  # maximum size of the scratch files
 
     # constants used in testing
     upload_part_size: int = 1024
     download_part_size: int = 8589934592
     default_file_size: int = 20 * upload_part_size**2
+    file_chunk_size: int = 1024**2  # chunk size for writing test files
+    file_cache_dir: Optional[Path] = None  # persistent cache for test files
+    file_cache_size: int = 10 * 1024**3  # maximum size of the file cache
+    sparse_files: bool = False  # create zero padded test files as sparse files
+    file_digest_table: Path = test_dir / "file_digests.json"
+    file_workers: int = 4  # number of threads for creating test files
+    file_content_profile: ContentProfile = "zeros"
+    file_content_seed: int = 0  # seed for the random content profiles
+    file_size_profile: SizeProfile = "metadata"
+    file_size_seed: int = 0  # seed for drawing the file sizes
+    file_size_median: int = 64 * 1024**2  # median of the log-normal file sizes
+    file_size_sigma: float = 1.5  # spread of the log-normal file sizes
+    file_size_small: int = 1024**2  # maximum size of small files in the mix
+    file_size_medium: int = 256 * 1024**2  # maximum size of medium files in the mix
+    file_size_small_share: float = 0.8  # share of small files in the mix
+    file_size_max: int = 16 * 1024**3  # upper limit for all drawn file sizes
+    checksum_chunk_size: int = 8 * 1024**2  # chunk size for verifying checksums
+    checksum_use_mmap: bool = False  # use memory maps for verifying checksums
+    verification_workers: Optional[int] = None  # processes for verifying checksums
+    upload_files_on_demand: bool = False  # create files right before their upload
+    upload_workers: int = 1  # number of files that are uploaded concurrently
+    batch_upload_parallelism: int = 2  # parallel processes for batch uploads
+    upload_timeline_label: Optional[str] = None  # e.g. versions of the services
+    ingest_timeout: int = 60  # seconds until ingested files must be stored
+    transform_cache_dir: Optional[Path] = None  # persistent cache for transformations
+    profile_transform: bool = False  # run the transformation under a profiler
+    profile_interval: float = 0.005  # sampling interval of the profiler in seconds
+    dsk_runner: DskRunnerMode = "subprocess"  # how to run the datasteward-kit
+    dsk_workers: int = 2  # number of worker processes for the datasteward-kit
+    incremental_load: bool = False  # skip loading artifacts that did not change
+    run_benchmarks: bool = False  # run the scenarios tagged as benchmarks
+    benchmark_submission_sizes: list[int] = [10, 100, 1000, 10000]  # noqa: RUF012
+    benchmark_batch_parallelism: list[int] = [1, 2, 4, 8]  # noqa: RUF012
+    benchmark_part_sizes: list[int] = [8, 16, 32, 64, 128, 256]  # noqa: RUF012
+    benchmark_upload_file_size: int = 512 * 1024**2  # file size for part sizes
 
     # Kafka config
     service_name: str = "testbed_kafka"
@@ -182,6 +226,31 @@ class Config(KafkaConfig, MongoDbConfig, S3Config):
             raise ValueError(f"Check operation modes: {error}") from error
         return self
 
+    @model_validator(mode="after")
+    def check_file_content_profile(self):
+        """Check that sparse files are only used with zero padded content."""
+        if self.sparse_files and self.file_content_profile != "zeros":
+            raise ValueError("Sparse files can only be used with the zeros profile")
+        return self
+
+    @model_validator(mode="after")
+    def check_file_size_profile(self):
+        """Check that the parameters of the size distributions are consistent."""
+        if not 0 < self.file_size_small <= self.file_size_medium:
+            raise ValueError("Small files must not be larger than medium files")
+        if not 0 <= self.file_size_small_share <= 1:
+            raise ValueError("The share of small files must be between 0 and 1")
+        return self
+
+    @model_validator(mode="after")
+    def check_scratch_dir(self):
+        """Check that the scratch directory is not specified twice."""
+        if self.scratch_dir and self.scratch_in_memory:
+            raise ValueError(
+                "Scratch files cannot be kept in memory and in a directory"
+            )
+        return self
+
     @model_validator(mode="after")
     def add_external_base_url(self):
         """Add base URL to all APIs.
@@ -28,6 +28,7 @@ from pydantic_settings import BaseSettings
 from pytest import fixture
 
 from fixtures.config import Config
+from fixtures.scratch import get_scratch_dir
 
 BASE_DIR = Path(__file__).parent.parent
 TMP_DIR = Path(tempfile.gettempdir())
@@ -62,9 +63,26 @@ class ConnectorConfig(BaseSettings):
     """Config for metadata and related submissions"""
 
     work_dir: Path = TMP_DIR / "connector"
-    user_public_key_path: Path = work_dir / "key.pub"
-    user_private_key_path: Path = work_dir / "key.sec"
-    download_dir: Path = work_dir / "download"
+
+    @classmethod
+    def in_dir(cls, work_dir: Path) -> "ConnectorConfig":
+        """Get a config with the working directory in the given directory."""
+        return cls(work_dir=work_dir / "connector")
+
+    @property
+    def user_public_key_path(self) -> Path:
+        """Get the file of the public key of the user."""
+        return self.work_dir / "key.pub"
+
+    @property
+    def user_private_key_path(self) -> Path:
+        """Get the file of the private key of the user."""
+        return self.work_dir / "key.sec"
+
+    @property
+    def download_dir(self) -> Path:
+        """Get the directory for downloaded files."""
+        return self.work_dir / "download"
 
 
 class ConnectorFixture:
@@ -104,5 +122,5 @@ class ConnectorFixture:
 @fixture(name="connector", scope="session")
 def connector_fixture(config: Config) -> Generator[ConnectorFixture, None, None]:
     """Pytest fixture for tests using the GHGA Connector."""
-    connector_config = ConnectorConfig()
+    connector_config = ConnectorConfig.in_dir(get_scratch_dir(config))
     yield ConnectorFixture(config, connector_config)
@@ -0,0 +1,249 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Content profiles for generated test files
+
+All profiles produce content of exactly the requested size that only depends
+on the file name, the file size and the seed, so that the checksums are stable.
+"""
+
+import hashlib
+import random
+import struct
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional
+
+from fixtures.config import Config, ContentProfile
+from fixtures.file_cache import get_digest_table
+
+__all__ = ["ContentProfile", "content_chunks", "content_digest"]
+
+RANDOM_BLOCK_SIZE = 1024**2  # fixed so that the content does not depend on chunking
+
+READ_LENGTH = 150  # length of the generated FASTQ reads
+READS_PER_BLOCK = 100  # number of FASTQ reads that are compressed at once
+VARIANTS_PER_BLOCK = 200  # number of VCF records that are compressed at once
+
+BASES = bytes.maketrans(bytes(range(256)), b"ACGT" * 64)
+QUALITIES = bytes.maketrans(bytes(range(256)), bytes(range(35, 67)) * 8)
+NUCLEOTIDES = "ACGT"
+GENOTYPES = ("0/1", "1/1", "0/0", "1/2")
+
+GZIP_WBITS = 31  # write a gzip header and trailer without file name and time
+GZIP_LEVEL = 6
+GZIP_FINISH_SIZE = 16  # upper bound for the final block and the gzip trailer
+GZIP_PADDING_HEADER = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff"
+GZIP_EMPTY_BODY = b"\x03\x00" + bytes(8)  # empty block, CRC32 and size of nothing
+GZIP_PADDING_MIN = len(GZIP_PADDING_HEADER) + 2 + 4 + len(GZIP_EMPTY_BODY)
+GZIP_PADDING_MAX = GZIP_PADDING_MIN + 0xFFFF - 4
+GZIP_MIN_SIZE = 64  # minimum size of generated gzip files
+
+
+def seeded_random(name: str, seed: int) -> random.Random:
+    """Get a random number generator seeded with the given file name and seed."""
+    digest = hashlib.sha256(f"{seed}:{name}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def zero_padded_chunks(name: str, file_size: int, chunk_size: int) -> Iterator[bytes]:
+    """Yield the content of a file consisting of its name and zero padding.
+
+    The content is yielded in chunks of the given size from a reused buffer,
+    so that memory usage does not depend on the file size.
+    """
+    first_line = f"{name}\n".encode()[:file_size]
+    yield first_line
+    remaining_bytes = file_size - len(first_line)
+    zero_chunk = bytes(min(chunk_size, remaining_bytes))
+    while remaining_bytes > 0:
+        chunk = zero_chunk
+        if remaining_bytes < len(chunk):
+            chunk = zero_chunk[:remaining_bytes]
+        yield chunk
+        remaining_bytes -= len(chunk)
+
+
+def random_chunks(name: str, file_size: int, seed: int) -> Iterator[bytes]:
+    """Yield the content of a file consisting of its name and random bytes.
+
+    The random bytes are incompressible, but deterministic for the given seed.
+    """
+    first_line = f"{name}\n".encode()[:file_size]
+    yield first_line
+    remaining_bytes = file_size - len(first_line)
+    rng = seeded_random(name, seed)
+    while remaining_bytes > 0:
+        chunk = rng.randbytes(RANDOM_BLOCK_SIZE)
+        if remaining_bytes < len(chunk):
+            chunk = chunk[:remaining_bytes]
+        yield chunk
+        remaining_bytes -= len(chunk)
+
+
+def fastq_blocks(name: str, seed: int) -> Iterator[bytes]:
+    """Yield an endless sequence of blocks of random FASTQ reads."""
+    rng = seeded_random(name, seed)
+    read_name = name.split(".", 1)[0].encode()
+    read_number = 0
+    while True:
+        num_bytes = READ_LENGTH * READS_PER_BLOCK
+        bases = rng.randbytes(num_bytes).translate(BASES)
+        qualities = rng.randbytes(num_bytes).translate(QUALITIES)
+        reads = []
+        for start in range(0, num_bytes, READ_LENGTH):
+            end = start + READ_LENGTH
+            read_number += 1
+            reads.append(
+                b"@%s:%d\n%s\n+\n%s\n"
+                % (read_name, read_number, bases[start:end], qualities[start:end])
+            )
+        yield b"".join(reads)
+
+
+def vcf_blocks(name: str, seed: int) -> Iterator[bytes]:
+    """Yield a VCF header followed by an endless sequence of blocks of variants."""
+    rng = seeded_random(name, seed)
+    sample = name.split(".", 1)[0]
+    yield (
+        "##fileformat=VCFv4.2\n"
+        "##source=archive-test-bed\n"
+        "##contig=<ID=chr1>\n"
+        '##INFO=<ID=DP,Number=1,Type=Integer,Description="Total Depth">\n'
+        '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n'
+        f"#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\t{sample}\n"
+    ).encode()
+    position = 0
+    while True:
+        random_bytes = rng.randbytes(VARIANTS_PER_BLOCK * 6)
+        records = []
+        for start in range(0, len(random_bytes), 6):
+            pos_high, pos_low, alleles, quality, depth, genotype = random_bytes[
+                start : start + 6
+            ]
+            position += 1 + (pos_high << 8 | pos_low) % 1000
+            ref = alleles & 3
+            alt = (ref + 1 + (alleles >> 2) % 3) & 3
+            records.append(
+                f"chr1\t{position}\t.\t{NUCLEOTIDES[ref]}\t{NUCLEOTIDES[alt]}"
+                f"\t{10 + quality % 90}\tPASS\tDP={5 + depth % 96}"
+                f"\tGT\t{GENOTYPES[genotype & 3]}\n"
+            )
+        yield "".join(records).encode()
+
+
+def gzip_padding(size: int) -> bytes:
+    """Get an empty gzip member of the given size.
+
+    The size is adjusted using a dummy subfield in the extra field of the header.
+    """
+    extra_length = size - GZIP_PADDING_MIN
+    extra = b"TB" + struct.pack("<H", extra_length) + bytes(extra_length)
+    return GZIP_PADDING_HEADER + struct.pack("<H", len(extra)) + extra + GZIP_EMPTY_BODY
+
+
+def gzip_chunks(blocks: Iterator[bytes], file_size: int) -> Iterator[bytes]:
+    """Yield a gzip stream of exactly the given size with the given content blocks.
+
+    As many blocks as fit are compressed into one gzip member, and the remaining
+    bytes are filled with empty gzip members, so the result is a valid gzip file.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    reserved_size = GZIP_FINISH_SIZE + GZIP_PADDING_MIN
+    emitted_size = 0
+    for block in blocks:
+        max_size = emitted_size + len(block) + len(block) // 100 + 64
+        if max_size + reserved_size <= file_size:
+            trial = compressor  # the block is certain to fit
+        else:
+            trial = compressor.copy()
+        data = trial.compress(block) + trial.flush(zlib.Z_SYNC_FLUSH)
+        if emitted_size + len(data) + reserved_size > file_size:
+            break
+        compressor = trial
+        emitted_size += len(data)
+        yield data
+    data = compressor.flush()
+    yield data
+    remaining_size = file_size - emitted_size - len(data)
+    while remaining_size:
+        padding_size = min(remaining_size, GZIP_PADDING_MAX)
+        if 0 < remaining_size - padding_size < GZIP_PADDING_MIN:
+            padding_size = remaining_size - GZIP_PADDING_MIN
+        yield gzip_padding(padding_size)
+        remaining_size -= padding_size
+
+
+def format_profile(name: str) -> ContentProfile:
+    """Get the content profile matching the format of the file with the given name."""
+    suffixes = Path(name.lower()).suffixes
+    if ".fastq" in suffixes or ".fq" in suffixes:
+        return "fastq"
+    if ".vcf" in suffixes:
+        return "vcf"
+    return "random"
+
+
+def content_chunks(
+    name: str,
+    file_size: int,
+    profile: ContentProfile = "zeros",
+    seed: int = 0,
+    chunk_size: int = 1024**2,
+) -> Iterator[bytes]:
+    """Yield the content of a file with the given name, size and content profile.
+
+    The formatted profile chooses the FASTQ or VCF profile depending on the file
+    name, or the random profile if the name does not indicate any of these formats.
+    Files that are too small to contain a padded gzip stream fall back
+    to the zeros profile.
+    """
+    if profile == "formatted":
+        profile = format_profile(name)
+    if profile in ("fastq", "vcf") and file_size < GZIP_MIN_SIZE:
+        profile = "zeros"
+    if profile == "random":
+        return random_chunks(name, file_size, seed)
+    if profile == "fastq":
+        return gzip_chunks(fastq_blocks(name, seed), file_size)
+    if profile == "vcf":
+        return gzip_chunks(vcf_blocks(name, seed), file_size)
+    return zero_padded_chunks(name, file_size, chunk_size)
+
+
+def content_digest(
+    name: str, file_size: int, config: Config, profile: Optional[ContentProfile] = None
+) -> str:
+    """Get the checksum of the content of a generated file without writing it.
+
+    The checksums are memoized in the digest table.
+    """
+    if profile is None:
+        profile = config.file_content_profile
+    seed = None if profile == "zeros" else config.file_content_seed
+    digest_table = get_digest_table(config.file_digest_table)
+    digest_key = digest_table.key(profile, name, file_size, seed)
+    checksum = digest_table.get(digest_key)
+    if not checksum:
+        hasher = hashlib.sha256()
+        for chunk in content_chunks(
+            name, file_size, profile, seed or 0, config.file_chunk_size
+        ):
+            hasher.update(chunk)
+        checksum = hasher.hexdigest()
+        digest_table.set(digest_key, checksum)
+    return checksum
@@ -18,13 +18,19 @@
 
 import os
 import shutil
+import subprocess
 import tempfile
-from collections.abc import Generator
+from collections.abc import Generator, Sequence
 from pathlib import Path
+from typing import Optional, Union
 
 from pydantic_settings import BaseSettings
 from pytest import fixture
 
+from fixtures.config import Config
+from fixtures.dsk_runner import DskRunner
+from fixtures.scratch import get_scratch_dir
+
 BASE_DIR = Path(__file__).parent.parent
 TMP_DIR = Path(tempfile.gettempdir())
 
@@ -33,10 +39,6 @@ class DskConfig(BaseSettings):
     """Config for metadata and related submissions"""
 
     submission_registry: Path = TMP_DIR / "submission"
-    event_store: Path = submission_registry / "event_store"
-    submission_store: Path = submission_registry / "submission_store"
-    accession_store: Path = submission_registry / "accession_store"
-    embedded_public_event: Path = event_store / "artifact.embedded_public"
 
     metadata_dir: Path = BASE_DIR / "example_data" / "metadata"
     metadata_config_path: Path = metadata_dir / "metadata_config.yaml"
@@ -52,17 +54,70 @@ class DskConfig(BaseSettings):
         "study_files",
     )
 
-    file_metadata_dir: Path = submission_registry / "file_metadata"
-    files_to_upload_tsv: Path = submission_registry / "files.tsv"
+    @classmethod
+    def in_dir(cls, work_dir: Path) -> "DskConfig":
+        """Get a config with the submission registry in the given directory."""
+        return cls(submission_registry=work_dir / "submission")
+
+    @property
+    def event_store(self) -> Path:
+        """Get the directory of the event store."""
+        return self.submission_registry / "event_store"
+
+    @property
+    def submission_store(self) -> Path:
+        """Get the directory of the submission store."""
+        return self.submission_registry / "submission_store"
+
+    @property
+    def accession_store(self) -> Path:
+        """Get the file of the accession store."""
+        return self.submission_registry / "accession_store"
+
+    @property
+    def embedded_public_event(self) -> Path:
+        """Get the directory of the embedded public artifact events."""
+        return self.event_store / "artifact.embedded_public"
+
+    @property
+    def file_metadata_dir(self) -> Path:
+        """Get the directory of the file metadata of the uploads."""
+        return self.submission_registry / "file_metadata"
+
+    @property
+    def files_to_upload_tsv(self) -> Path:
+        """Get the file listing the files to upload."""
+        return self.submission_registry / "files.tsv"
+
+    @property
+    def load_manifest(self) -> Path:
+        """Get the file of the load manifest."""
+        return self.submission_registry / "load_manifest.json"
+
+    @property
+    def event_store_index(self) -> Path:
+        """Get the file of the event store index."""
+        return self.submission_registry / "event_store_index.json"
 
 
 class DskFixture:
     """Data Steward Kit fixture"""
 
     config: DskConfig
+    runner: DskRunner
 
-    def __init__(self, config: DskConfig):
+    def __init__(self, config: DskConfig, runner: Optional[DskRunner] = None):
         self.config = config
+        self.runner = runner or DskRunner()
+
+    def run(
+        self,
+        args: Sequence[Union[str, Path]],
+        timeout: Optional[float] = None,
+        cwd: Optional[Path] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run a command of the datasteward-kit with the configured runner."""
+        return self.runner.run([str(arg) for arg in args], timeout=timeout, cwd=cwd)
 
     def reset_work_dir(self):
         submission_registry_path = self.config.submission_registry
@@ -84,7 +139,9 @@ class DskFixture:
 
 
 @fixture(name="dsk", scope="session")
-def dsk_fixture() -> Generator[DskFixture, None, None]:
+def dsk_fixture(config: Config) -> Generator[DskFixture, None, None]:
     """Pytest fixture for tests using the Data Steward Kit."""
-    config = DskConfig()
-    yield DskFixture(config=config)
+    dsk_config = DskConfig.in_dir(get_scratch_dir(config))
+    runner = DskRunner(mode=config.dsk_runner, workers=config.dsk_workers)
+    yield DskFixture(config=dsk_config, runner=runner)
+    runner.close()
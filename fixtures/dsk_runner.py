@@ -0,0 +1,168 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Execution engines for commands of the datasteward-kit
+
+Commands can be run as separate processes, like a data steward would run them,
+in the test bed process itself, or in a pool of warm worker processes that have
+already imported the datasteward-kit. The latter two avoid the startup cost
+of the Python interpreter and the datasteward-kit for every command.
+"""
+
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import traceback
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Optional
+
+from ghga_datasteward_kit.cli import cli
+from typer.testing import CliRunner
+
+from fixtures.config import DskRunnerMode
+
+__all__ = ["DskRunner", "DskRunnerMode", "invoke_in_process"]
+
+DSK_COMMAND = "ghga-datasteward-kit"
+
+
+class CurrentStderrHandler(logging.StreamHandler):
+    """Log handler that always writes to the current standard error stream.
+
+    This makes sure log messages are captured when standard error is redirected.
+    """
+
+    @property
+    def stream(self):
+        """Get the current standard error stream."""
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        """Ignore setting the stream."""
+
+
+def invoke_in_process(
+    args: Sequence[str], cwd: Optional[Path] = None
+) -> tuple[int, str, str]:
+    """Invoke a command of the datasteward-kit in the current process.
+
+    Like the command line entry point of the datasteward-kit, log messages
+    with level INFO and above are written to standard error. If the command
+    raises an unexpected exception, its traceback is added to standard error.
+    Returns the exit code and the output to standard output and standard error.
+    """
+    root_logger = logging.getLogger()
+    root_level = root_logger.level
+    handlers = list(root_logger.handlers)
+    handler = CurrentStderrHandler()
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+    original_cwd = os.getcwd()
+    if cwd:
+        os.chdir(cwd)
+    try:
+        result = CliRunner(mix_stderr=False).invoke(cli, list(args))
+    finally:
+        os.chdir(original_cwd)
+        for added_handler in root_logger.handlers[:]:
+            if added_handler not in handlers:
+                root_logger.removeHandler(added_handler)
+        root_logger.setLevel(root_level)
+
+    stderr = result.stderr
+    exception = result.exception
+    # successful commands also end with a SystemExit that is recorded in exc_info
+    if exception is not None and not isinstance(exception, SystemExit):
+        stderr += "".join(
+            traceback.format_exception(
+                type(exception), exception, exception.__traceback__
+            )
+        )
+    return result.exit_code, result.stdout, stderr
+
+
+def warm_up() -> None:
+    """Prepare a worker process for running commands.
+
+    Nothing needs to be done here, since unpickling this function already
+    imports the datasteward-kit before the first command is submitted.
+    """
+
+
+class DskRunner:
+    """Runner for commands of the datasteward-kit.
+
+    The results are always returned as completed processes, so that they can be
+    checked in the same way, regardless of the mode of execution. The timeout
+    is ignored when the commands are run in the test bed process. Since these
+    commands redirect the standard streams of the whole process, they are
+    run one at a time, even if they are started from several threads.
+    """
+
+    def __init__(self, mode: DskRunnerMode = "subprocess", workers: int = 1):
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if mode == "worker_pool":
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_up,
+            )
+
+    def run(
+        self,
+        args: Sequence[str],
+        timeout: Optional[float] = None,
+        cwd: Optional[Path] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run the datasteward-kit with the given command line arguments."""
+        command = [DSK_COMMAND, *args]
+        if self.mode == "subprocess":
+            return subprocess.run(  # nosec B607, B603
+                command,  # noqa: S603
+                capture_output=True,
+                check=False,
+                cwd=cwd,
+                encoding="utf-8",
+                text=True,
+                timeout=timeout,
+            )
+        if self._pool:
+            future = self._pool.submit(
+                invoke_in_process, command[1:], cwd or Path.cwd()
+            )
+            try:
+                returncode, stdout, stderr = future.result(timeout=timeout)
+            except FutureTimeoutError as error:
+                raise subprocess.TimeoutExpired(command, timeout or 0) from error
+        else:
+            with self._lock:
+                returncode, stdout, stderr = invoke_in_process(command[1:], cwd)
+        return subprocess.CompletedProcess(command, returncode, stdout, stderr)
+
+    def close(self) -> None:
+        """Shut down the worker processes if there are any."""
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
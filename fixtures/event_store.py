@@ -0,0 +1,228 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Persistent index of the source events and artifacts in an event store"""
+
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+import ijson
+
+__all__ = ["EventStoreIndex"]
+
+INDEX_VERSION = 1
+
+SOURCE_EVENT_TOPIC = "source_events"
+SOURCE_EVENT_TYPE = "source_event"
+ARTIFACT_TOPIC_PREFIX = "artifact"
+
+# parser events after which no more datasets can follow in a source event
+DATASETS_END_EVENTS = {
+    ("payload.content.datasets", "end_array"),
+    ("payload.content", "end_map"),
+}
+
+
+def signature(stat: os.stat_result) -> list[int]:
+    """Get a signature that changes whenever a file or directory is replaced.
+
+    The inode is included, because copies of event stores keep modification times.
+    """
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def scan_dir(path: Path) -> list[os.DirEntry]:
+    """Get the entries of the given directory, or none if it does not exist."""
+    try:
+        with os.scandir(path) as entries:
+            return list(entries)
+    except FileNotFoundError:
+        return []
+
+
+def read_source_event(path: Path) -> Optional[dict[str, Any]]:
+    """Extract the submission ID and the dataset titles and aliases of a source event.
+
+    The event file is parsed as a stream, and parsing stops as soon as all
+    needed fields are known. Other events are recognized by their type, which is
+    written first, so only the beginning of the file is read. For source events,
+    parsing stops after the datasets, which precede most other metadata classes.
+    Returns None if the given file does not contain a source event.
+    """
+    event_type: Optional[str] = None
+    submission_id: Optional[str] = None
+    titles: list[str] = []
+    aliases: list[str] = []
+    datasets_done = False
+    with open(path, "rb") as event_file:
+        for prefix, event, value in ijson.parse(event_file):
+            if prefix == "type_":
+                event_type = value
+                if event_type != SOURCE_EVENT_TYPE:
+                    return None
+            elif prefix == "payload.submission_id":
+                submission_id = value
+            elif prefix == "payload.content.datasets.item.title":
+                titles.append(value)
+            elif prefix == "payload.content.datasets.item.alias":
+                aliases.append(value)
+            elif (prefix, event) in DATASETS_END_EVENTS:
+                datasets_done = True
+            if event_type and datasets_done and submission_id is not None:
+                break
+    if not event_type or not datasets_done:
+        return None
+    return {"submission_id": submission_id, "titles": titles, "aliases": aliases}
+
+
+class EventStoreIndex:
+    """Index of the source events and artifacts in an event store.
+
+    Source events are indexed by submission ID and by title and alias of the
+    contained datasets, and the artifacts derived from them are indexed by topic.
+    The index is stored in the given file and updated when it is created.
+    Only new or modified source events are read, and only the listings of
+    artifact topics that have changed are scanned again.
+    """
+
+    def __init__(self, event_store: Path, index_path: Path):
+        self.event_store = event_store
+        self.index_path = index_path
+        self.sources: dict[str, dict[str, Any]] = {}
+        self.artifacts: dict[str, dict[str, Any]] = {}
+        self._by_field: dict[str, dict[str, set[str]]] = {}
+        self._artifact_keys: dict[str, set[str]] = {}
+        self._load()
+        self.refresh()
+
+    def _load(self) -> None:
+        """Load the stored index if it is valid."""
+        try:
+            index = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return
+        if index.get("version") == INDEX_VERSION:
+            self.sources = index["sources"]
+            self.artifacts = index["artifacts"]
+
+    def _save(self) -> None:
+        """Store the index."""
+        index = {
+            "version": INDEX_VERSION,
+            "sources": self.sources,
+            "artifacts": self.artifacts,
+        }
+        self.index_path.write_text(json.dumps(index))
+
+    def refresh(self) -> None:
+        """Update the index with the changes in the event store."""
+        changed = False
+
+        sources = {}
+        for entry in scan_dir(self.event_store / SOURCE_EVENT_TOPIC):
+            if not entry.name.endswith(".json"):
+                continue
+            key = entry.name.removesuffix(".json")
+            source = self.sources.get(key)
+            file_signature = signature(entry.stat())
+            if not source or source["signature"] != file_signature:
+                source = read_source_event(Path(entry.path)) or {}
+                source["signature"] = file_signature
+                changed = True
+            sources[key] = source
+        changed = changed or sources.keys() != self.sources.keys()
+
+        artifacts = {}
+        for entry in scan_dir(self.event_store):
+            if not entry.name.startswith(ARTIFACT_TOPIC_PREFIX) or not entry.is_dir():
+                continue
+            topic = self.artifacts.get(entry.name)
+            dir_signature = signature(entry.stat())
+            if not topic or topic["signature"] != dir_signature:
+                keys = sorted(
+                    name.removesuffix(".json")
+                    for name in os.listdir(entry.path)
+                    if name.endswith(".json")
+                )
+                topic = {"signature": dir_signature, "keys": keys}
+                changed = True
+            artifacts[entry.name] = topic
+        changed = changed or artifacts.keys() != self.artifacts.keys()
+
+        self.sources, self.artifacts = sources, artifacts
+        self._build_lookups()
+        if changed:
+            self._save()
+
+    def _build_lookups(self) -> None:
+        """Build the lookup tables from the indexed source events and artifacts."""
+        self._by_field = {
+            field: defaultdict(set) for field in ("submission_id", "title", "alias")
+        }
+        for key, source in self.sources.items():
+            if "submission_id" not in source:
+                continue  # not a source event
+            self._by_field["submission_id"][source["submission_id"]].add(key)
+            for title in source["titles"]:
+                self._by_field["title"][title].add(key)
+            for alias in source["aliases"]:
+                self._by_field["alias"][alias].add(key)
+        self._artifact_keys = {
+            topic: set(artifacts["keys"]) for topic, artifacts in self.artifacts.items()
+        }
+
+    @property
+    def artifact_topics(self) -> list[str]:
+        """Get the names of all artifact topics."""
+        return sorted(self.artifacts)
+
+    def find(
+        self,
+        *,
+        submission_id: Optional[str] = None,
+        title: Optional[str] = None,
+        alias: Optional[str] = None,
+    ) -> set[str]:
+        """Get the keys of the source events matching all of the given criteria.
+
+        A source event matches a dataset title or alias if it contains
+        a dataset with this title or alias.
+        """
+        keys: Optional[set[str]] = None
+        for field, value in (
+            ("submission_id", submission_id),
+            ("title", title),
+            ("alias", alias),
+        ):
+            if value is not None:
+                matches = self._by_field[field].get(value, set())
+                keys = matches if keys is None else keys & matches
+        return set(keys or ())
+
+    def source_event_path(self, key: str) -> Path:
+        """Get the path of the source event with the given key."""
+        return self.event_store / SOURCE_EVENT_TOPIC / f"{key}.json"
+
+    def artifact_paths(self, key: str) -> list[Path]:
+        """Get the paths of all artifacts derived from the given source event."""
+        return [
+            self.event_store / topic / f"{key}.json"
+            for topic in self.artifact_topics
+            if key in self._artifact_keys[topic]
+        ]
@@ -16,22 +16,37 @@
 
 """Fixture for testing code that uses the FileObject provider."""
 
-import json
+import hashlib
+import heapq
 import os
-import tempfile
-from collections.abc import Generator
+from collections import deque
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from hexkit.providers.s3.testutils import FileObject
 from pydantic import BaseModel
 from pytest import fixture
 
 from fixtures.config import Config
+from fixtures.content import content_chunks, content_digest
 from fixtures.dsk import DskFixture
-from fixtures.utils import calculate_checksum
+from fixtures.file_cache import FileCache, get_digest_table
+from fixtures.metadata import iter_file_records, prepare_metadata
+from fixtures.scratch import check_scratch_space, get_scratch_dir
 
-__all__ = ["FileBatch", "FileObject", "batch_file_fixture", "file_fixture"]
+__all__ = [
+    "FileBatch",
+    "FileObject",
+    "PendingFileObject",
+    "batch_file_fixture",
+    "check_file_space",
+    "create_named_file",
+    "file_fixture",
+    "materialized_file",
+]
 
 
 class FileBatch(BaseModel):
@@ -41,6 +56,44 @@ class FileBatch(BaseModel):
     tsv_file: Path
 
 
+class PendingFileObject(FileObject):
+    """File object for a test file that is only created when it is needed"""
+
+    file_size: int
+    checksum: Optional[str] = None
+
+
+def write_file_chunks(file_path: Path, chunks: Iterable[bytes]) -> str:
+    """Write the given chunks to a file and return its checksum.
+
+    The checksum is computed while writing, so the file is never read back.
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk)
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def write_sparse_named_file(
+    file_path: Path, name: str, file_size: int, config: Config
+) -> str:
+    """Write a sparse file consisting of its name and zero padding.
+
+    Only the name is actually written, the zero padding is created by extending
+    the file, which uses no disk blocks on file systems supporting sparse files.
+    The checksum is looked up in the digest table or computed without any disk I/O.
+    This can only be used with the zeros content profile.
+    """
+    first_line = f"{name}\n".encode()[:file_size]
+    with open(file_path, "wb") as file:
+        file.write(first_line)
+        file.truncate(file_size)
+
+    return content_digest(name, file_size, config, profile="zeros")
+
+
 def create_named_file(
     target_dir: Path,
     config: Config,
@@ -48,8 +101,13 @@ def create_named_file(
     file_size: Optional[int] = None,
     alias: Optional[str] = None,
     checksum: Optional[str] = None,
+    file_cache: Optional[FileCache] = None,
 ) -> FileObject:
-    """Create a file with given parameters"""
+    """Create a file with given parameters
+
+    If a file cache is passed, a cached file is reused if possible,
+    and newly created files are stored in the cache.
+    """
     file_path = target_dir / name
 
     if not file_size:
@@ -57,26 +115,62 @@ def create_named_file(
     if not alias:
         alias = os.path.splitext(name)[0]
 
-    with open(file_path, "wb") as file:
-        first_line = f"{name}\n".encode()
-        if file_size <= len(first_line):
-            first_line = first_line[:file_size]
-            file.write(first_line)
-        else:
-            remaining_bytes = file_size - len(first_line)
-            content = first_line + b"\0" * remaining_bytes
-            file.write(content)
+    cache_key = None
+    if file_cache:
+        cache_key = file_cache.key(
+            name=name,
+            size=file_size,
+            profile=config.file_content_profile,
+            checksum=checksum,
+            seed=config.file_content_seed,
+            sparse=config.sparse_files,
+        )
+        cached_path = file_cache.get(cache_key)
+        if cached_path:
+            return FileObject(
+                file_path=cached_path,
+                bucket_id=config.staging_bucket,
+                object_id=alias,
+            )
+        file_path = file_cache.path_for(cache_key, name)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if config.sparse_files:
+        created_file_checksum = write_sparse_named_file(
+            file_path=file_path, name=name, file_size=file_size, config=config
+        )
+    else:
+        created_file_checksum = write_file_chunks(
+            file_path=file_path,
+            chunks=content_chunks(
+                name,
+                file_size,
+                profile=config.file_content_profile,
+                seed=config.file_content_seed,
+                chunk_size=config.file_chunk_size,
+            ),
+        )
 
     # Validate created file with given checksum
-    if checksum:
-        with open(file_path, "rb") as file:
-            created_file_checksum = calculate_checksum(file.read())
-        if checksum != created_file_checksum:
-            raise RuntimeError(
-                f"Expected checksum {checksum}, "
-                f"but got {created_file_checksum} "
-                f"for file {file_path}."
-            )
+    if checksum and checksum != created_file_checksum:
+        if file_cache and cache_key:
+            file_cache.remove(cache_key)
+        else:
+            os.remove(file_path)
+        raise RuntimeError(
+            f"Expected checksum {checksum}, "
+            f"but got {created_file_checksum} "
+            f"for file {file_path}."
+        )
+
+    if file_cache and cache_key:
+        file_cache.add(
+            cache_key,
+            name=name,
+            size=file_size,
+            profile=config.file_content_profile,
+            checksum=created_file_checksum,
+        )
 
     file_object = FileObject(
         file_path=Path(file_path),
@@ -86,59 +180,178 @@ def create_named_file(
     return file_object
 
 
+def create_named_files(
+    target_dir: Path,
+    config: Config,
+    files: Iterable[dict[str, Any]],
+    file_cache: Optional[FileCache] = None,
+) -> list[FileObject]:
+    """Create and validate files for the given file metadata concurrently.
+
+    The number of worker threads is determined by the file_workers setting.
+    Writing and hashing release the GIL, so threads suffice to keep all cores busy.
+    The file metadata is consumed as it is needed, and only twice as many files
+    as there are workers are submitted at a time, so that a stream of file records
+    is never held in memory. The created file objects are returned in the order
+    of the given metadata.
+    """
+
+    def create_file(file_: dict[str, Any]) -> FileObject:
+        return create_named_file(
+            target_dir=target_dir,
+            config=config,
+            name=file_["name"],
+            file_size=file_["size"],
+            alias=file_["alias"],
+            checksum=file_["checksum"],
+            file_cache=file_cache,
+        )
+
+    created_files: list[FileObject] = []
+    pending: deque[Future[FileObject]] = deque()
+    with ThreadPoolExecutor(max_workers=config.file_workers) as executor:
+        for file_ in files:
+            if len(pending) >= 2 * config.file_workers:
+                created_files.append(pending.popleft().result())
+            pending.append(executor.submit(create_file, file_))
+        created_files.extend(future.result() for future in pending)
+    get_digest_table(config.file_digest_table).flush()
+    return created_files
+
+
+def check_file_space(
+    target_dir: Path,
+    config: Config,
+    files: Iterable[dict[str, Any]],
+    on_demand: bool = False,
+    file_cache: Optional[FileCache] = None,
+) -> None:
+    """Check that the files for the given metadata fit into the target directory.
+
+    Files created on demand only need space for as many of the largest files
+    as are uploaded at the same time. Sparse files and files stored in the
+    file cache need no scratch space.
+    """
+    if config.sparse_files or (file_cache and not on_demand):
+        return
+    file_sizes: Iterable[int] = (
+        file_["size"] or config.default_file_size for file_ in files
+    )
+    if on_demand:
+        file_sizes = heapq.nlargest(config.upload_workers, file_sizes)
+    required_size = sum(file_sizes)
+    check_scratch_space(target_dir, required_size, config)
+
+
+@contextmanager
+def materialized_file(file_object: FileObject, config: Config) -> Iterator[FileObject]:
+    """Make sure that the file for the given file object exists within the context.
+
+    Pending file objects are created when entering the context and removed
+    when leaving it, all other file objects are passed through unchanged.
+    """
+    if not isinstance(file_object, PendingFileObject):
+        yield file_object
+        return
+    file_path = file_object.file_path
+    created_file = create_named_file(
+        target_dir=file_path.parent,
+        config=config,
+        name=file_path.name,
+        file_size=file_object.file_size,
+        alias=file_object.object_id,
+        checksum=file_object.checksum,
+    )
+    try:
+        yield created_file
+    finally:
+        os.remove(created_file.file_path)
+
+
 @fixture(name="file_fixture")
 def file_fixture(
-    config: Config, dsk: DskFixture
+    config: Config,
+    dsk: DskFixture,
+    file_cache: Optional[FileCache],
 ) -> Generator[list[FileObject], None, None]:
-    """File fixture that provides temporary files for the minimal metadata."""
-    temp_dir = Path(tempfile.gettempdir())
-    metadata = json.loads(dsk.config.minimal_metadata_path.read_text())
+    """File fixture that provides temporary files for the minimal metadata.
 
-    created_files = []
-    for file_field in dsk.config.metadata_file_fields:
-        files = metadata[file_field]
-        for file_ in files:
-            file_object = create_named_file(
-                target_dir=temp_dir,
-                config=config,
-                name=file_["name"],
+    If the file cache is enabled, the files are taken from the cache
+    and are not removed after use. If files are uploaded on demand,
+    only pending file objects are provided, which need to be materialized.
+    The file records are streamed from the metadata, once for checking
+    the required space and once for creating the files.
+    """
+    temp_dir = get_scratch_dir(config)
+    file_fields = dsk.config.metadata_file_fields
+    metadata_path = prepare_metadata(
+        dsk.config.minimal_metadata_path, config, file_fields
+    )
+    check_file_space(
+        temp_dir,
+        config,
+        iter_file_records(metadata_path, file_fields),
+        config.upload_files_on_demand,
+        file_cache,
+    )
+    files = iter_file_records(metadata_path, file_fields)
+    if config.upload_files_on_demand:
+        yield [
+            PendingFileObject(
+                file_path=temp_dir / file_["name"],
+                bucket_id=config.staging_bucket,
+                object_id=file_["alias"],
                 file_size=file_["size"],
-                alias=file_["alias"],
                 checksum=file_["checksum"],
             )
+            for file_ in files
+        ]
+        return
 
-            created_files.append(file_object)
+    created_files = create_named_files(
+        target_dir=temp_dir, config=config, files=files, file_cache=file_cache
+    )
 
     yield created_files
 
-    for file_object in created_files:
-        os.remove(file_object.file_path)
+    if not file_cache:
+        for file_object in created_files:
+            os.remove(file_object.file_path)
 
 
 @fixture(name="batch_file_fixture")
 def batch_file_fixture(
-    config: Config, dsk: DskFixture
+    config: Config,
+    dsk: DskFixture,
+    file_cache: Optional[FileCache],
 ) -> Generator[FileBatch, None, None]:
-    """Batch file fixture that provides temporary files for the complete metadata."""
-    temp_dir = Path(tempfile.gettempdir())
-    metadata = json.loads(dsk.config.complete_metadata_path.read_text())
+    """Batch file fixture that provides temporary files for the complete metadata.
+
+    If the file cache is enabled, the files are taken from the cache
+    and are not removed after use. The file records are streamed from
+    the metadata like in the file fixture.
+    """
+    temp_dir = get_scratch_dir(config)
+    file_fields = dsk.config.metadata_file_fields
+    metadata_path = prepare_metadata(
+        dsk.config.complete_metadata_path, config, file_fields
+    )
+    check_file_space(
+        temp_dir,
+        config,
+        iter_file_records(metadata_path, file_fields),
+        file_cache=file_cache,
+    )
+    created_files = create_named_files(
+        target_dir=temp_dir,
+        config=config,
+        files=iter_file_records(metadata_path, file_fields),
+        file_cache=file_cache,
+    )
 
-    created_files = []
     with open(dsk.config.files_to_upload_tsv, "w", encoding="utf-8") as tsv_file:
-        for file_field in dsk.config.metadata_file_fields:
-            files = metadata[file_field]
-            for file_ in files:
-                file_object = create_named_file(
-                    target_dir=temp_dir,
-                    config=config,
-                    name=file_["name"],
-                    file_size=file_["size"],
-                    alias=file_["alias"],
-                    checksum=file_["checksum"],
-                )
-
-                created_files.append(file_object)
-                tsv_file.write(f"{file_object.file_path}\t{file_object.object_id}\n")
+        for file_object in created_files:
+            tsv_file.write(f"{file_object.file_path}\t{file_object.object_id}\n")
 
     file_batch = FileBatch(
         file_objects=created_files, tsv_file=dsk.config.files_to_upload_tsv
@@ -146,5 +359,6 @@ def batch_file_fixture(
 
     yield file_batch
 
-    for file_object in file_batch.file_objects:
-        os.remove(file_object.file_path)
+    if not file_cache:
+        for file_object in file_batch.file_objects:
+            os.remove(file_object.file_path)
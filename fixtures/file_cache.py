@@ -0,0 +1,252 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Persistent caches for generated test files"""
+
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections.abc import Generator
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel
+from pytest import fixture
+
+from fixtures.config import Config
+
+__all__ = ["DigestTable", "FileCache", "file_cache_fixture", "get_digest_table"]
+
+
+class FileCacheEntry(BaseModel):
+    """Manifest entry for a cached file"""
+
+    name: str
+    size: int
+    profile: str
+    checksum: str
+    mtime_ns: int
+    last_used: float
+
+
+class FileCache:
+    """Content-addressed on-disk cache for generated test files.
+
+    Files are stored under a key derived from their name, size, content profile,
+    seed, sparseness and expected checksum. A manifest keeps track of the cached
+    files, and the least recently used files are evicted when the cache exceeds
+    its maximum size. Files that have been used in the current session are never
+    evicted. Changes of the manifest are kept in memory and only saved when files
+    are evicted or when the cache is closed at the end of the session.
+    """
+
+    manifest_name = "manifest.json"
+
+    def __init__(self, cache_dir: Path, max_size: int):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.manifest_path = cache_dir / self.manifest_name
+        self._lock = threading.Lock()
+        self._pinned: set[str] = set()
+        self._modified = False
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries = self._load_manifest()
+
+    @staticmethod
+    def key(
+        name: str,
+        size: int,
+        profile: str,
+        checksum: Optional[str],
+        seed: int = 0,
+        sparse: bool = False,
+    ) -> str:
+        """Get the cache key for a file with the given properties."""
+        key_data = "\0".join(
+            (name, str(size), profile, checksum or "", str(seed), str(sparse))
+        )
+        return hashlib.sha256(key_data.encode()).hexdigest()
+
+    def path_for(self, key: str, name: str) -> Path:
+        """Get the path where a file with the given key is stored in the cache."""
+        return self.cache_dir / key[:2] / key / name
+
+    def get(self, key: str) -> Optional[Path]:
+        """Get the path of a cached and unmodified file with the given key.
+
+        Returns None if no such file exists in the cache.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            path = self.path_for(key, entry.name)
+            expected = (entry.size, entry.mtime_ns)
+            stat = path.stat() if path.exists() else None
+            if not stat or (stat.st_size, stat.st_mtime_ns) != expected:
+                self._remove_entry(key)
+                return None
+            entry.last_used = time.time()
+            self._pinned.add(key)
+            self._modified = True
+        return path
+
+    def add(self, key: str, name: str, size: int, profile: str, checksum: str) -> None:
+        """Register a file that has been written to the path for the given key."""
+        path = self.path_for(key, name)
+        with self._lock:
+            self._entries[key] = FileCacheEntry(
+                name=name,
+                size=size,
+                profile=profile,
+                checksum=checksum,
+                mtime_ns=path.stat().st_mtime_ns,
+                last_used=time.time(),
+            )
+            self._pinned.add(key)
+            self._modified = True
+            if self._evict():
+                self._save_manifest()
+
+    def remove(self, key: str) -> None:
+        """Remove the file with the given key from the cache."""
+        with self._lock:
+            self._remove_entry(key)
+
+    def close(self) -> None:
+        """Save the manifest if it has been modified."""
+        with self._lock:
+            if self._modified:
+                self._save_manifest()
+
+    def _evict(self) -> bool:
+        """Remove least recently used files until the cache is small enough.
+
+        Returns True if any files have been removed.
+        """
+        total_size = sum(entry.size for entry in self._entries.values())
+        if total_size <= self.max_size:
+            return False
+        candidates = sorted(
+            (key for key in self._entries if key not in self._pinned),
+            key=lambda key: self._entries[key].last_used,
+        )
+        for key in candidates:
+            if total_size <= self.max_size:
+                break
+            total_size -= self._entries[key].size
+            self._remove_entry(key)
+        return True
+
+    def _remove_entry(self, key: str) -> None:
+        """Remove the entry with the given key and the corresponding file."""
+        if self._entries.pop(key, None):
+            self._modified = True
+        shutil.rmtree(self.cache_dir / key[:2] / key, ignore_errors=True)
+
+    def _load_manifest(self) -> dict[str, FileCacheEntry]:
+        """Load the manifest of the cache."""
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {
+            key: FileCacheEntry.model_validate(entry)
+            for key, entry in manifest.get("entries", {}).items()
+        }
+
+    def _save_manifest(self) -> None:
+        """Atomically save the manifest of the cache."""
+        manifest = {
+            "entries": {key: entry.model_dump() for key, entry in self._entries.items()}
+        }
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp_path, self.manifest_path)
+        self._modified = False
+
+
+class DigestTable:
+    """Small on-disk table of memoized checksums of generated files.
+
+    The table is kept in memory, and new checksums are only written back to disk
+    when the table is flushed, so that recording many checksums does not rewrite
+    the table every time. Tables obtained via get_digest_table() are also flushed
+    when the test session exits.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._modified = False
+        try:
+            self._digests: dict[str, str] = json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._digests = {}
+
+    @staticmethod
+    def key(*parts: object) -> str:
+        """Get the key for a file with the given properties."""
+        return json.dumps(parts)
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the memoized checksum for the given key."""
+        with self._lock:
+            return self._digests.get(key)
+
+    def set(self, key: str, checksum: str) -> None:
+        """Memoize the checksum for the given key."""
+        with self._lock:
+            if self._digests.get(key) != checksum:
+                self._digests[key] = checksum
+                self._modified = True
+
+    def flush(self) -> None:
+        """Atomically write the table to disk if it has been modified."""
+        with self._lock:
+            if not self._modified:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._digests, indent=2))
+            os.replace(tmp_path, self.path)
+            self._modified = False
+
+
+@lru_cache
+def get_digest_table(path: Path) -> DigestTable:
+    """Get the digest table stored at the given path."""
+    digest_table = DigestTable(path)
+    atexit.register(digest_table.flush)
+    return digest_table
+
+
+@fixture(name="file_cache", scope="session")
+def file_cache_fixture(config: Config) -> Generator[Optional[FileCache], None, None]:
+    """Fixture that provides the file cache if it has been configured."""
+    if not config.file_cache_dir:
+        yield None
+        return
+    file_cache = FileCache(
+        cache_dir=config.file_cache_dir, max_size=config.file_cache_size
+    )
+    yield file_cache
+    file_cache.close()
@@ -0,0 +1,74 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Size distribution profiles for generated test files
+
+The sizes are drawn from a random number generator that is seeded with the file
+name and the configured seed, so that every file always gets the same size.
+"""
+
+import math
+from pathlib import Path
+
+from fixtures.config import Config, SizeProfile
+from fixtures.content import seeded_random
+
+__all__ = ["SizeProfile", "file_size"]
+
+
+def lognormal_size(name: str, config: Config) -> int:
+    """Draw a file size from a long-tailed log-normal distribution."""
+    rng = seeded_random(f"size:{name}", config.file_size_seed)
+    mu = math.log(config.file_size_median)
+    return round(rng.lognormvariate(mu, config.file_size_sigma))
+
+
+def mixed_size(name: str, config: Config) -> int:
+    """Draw a file size from a mix of small and medium sized files."""
+    rng = seeded_random(f"size:{name}", config.file_size_seed)
+    if rng.random() < config.file_size_small_share:
+        return rng.randint(1, config.file_size_small)
+    return rng.randint(config.file_size_small, config.file_size_medium)
+
+
+def size_profile(name: str) -> SizeProfile:
+    """Get the size profile matching the format of the file with the given name."""
+    suffixes = Path(name.lower()).suffixes
+    if ".fastq" in suffixes or ".fq" in suffixes:
+        return "lognormal"
+    if ".vcf" in suffixes:
+        return "mixed"
+    return "metadata"
+
+
+def file_size(name: str, size: int, config: Config) -> int:
+    """Get the size of a generated file with the given name and metadata size.
+
+    The metadata profile keeps the size from the metadata. The formatted profile
+    chooses the log-normal profile for FASTQ files and the mixed profile for VCF
+    files, and keeps the size from the metadata for other files.
+    All drawn sizes are at least one byte and at most the maximum file size.
+    """
+    profile = config.file_size_profile
+    if profile == "formatted":
+        profile = size_profile(name)
+    if profile == "lognormal":
+        size = lognormal_size(name, config)
+    elif profile == "mixed":
+        size = mixed_size(name, config)
+    else:
+        return size
+    return max(1, min(size, config.file_size_max))
@@ -0,0 +1,159 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tracker for the latency of the file ingest"""
+
+import asyncio
+import math
+import time
+from collections.abc import Iterable
+from typing import Any, NamedTuple, Optional
+
+from fixtures.config import Config
+from fixtures.mongo import MongoFixture
+from fixtures.s3 import S3Fixture
+
+__all__ = ["IngestLatency", "IngestLatencyTracker", "latency_percentiles"]
+
+INTERVAL = 0.1  # interval for polling the file registry and the bucket in seconds
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class IngestLatency(NamedTuple):
+    """Time after the start of the ingest until a file became available"""
+
+    accession: str
+    object_id: Optional[str]  # in the permanent bucket
+    registered: Optional[float]  # seconds until the file registry document appeared
+    stored: Optional[float]  # seconds until the object was in the permanent bucket
+
+
+def latency_percentiles(latencies: Iterable[Optional[float]]) -> dict[str, Any]:
+    """Get the nearest-rank percentiles and the maximum of the given latencies.
+
+    Latencies that are None are left out, but are counted as missing.
+    """
+    latencies = list(latencies)
+    values = sorted(latency for latency in latencies if latency is not None)
+    missing = len(latencies) - len(values)
+    summary: dict[str, Any] = {
+        f"p{percentile}": (
+            values[max(math.ceil(percentile / 100 * len(values)) - 1, 0)]
+            if values
+            else None
+        )
+        for percentile in PERCENTILES
+    }
+    summary["max"] = values[-1] if values else None
+    summary["count"] = len(values)
+    summary["missing"] = missing
+    return summary
+
+
+class IngestLatencyTracker:
+    """Tracker for the time until ingested files become available.
+
+    The tracker must be created right before the ingest is started, and then
+    polls the file registry and the permanent bucket while the ingest is running.
+    It stops when all files are in the permanent bucket, or when the timeout
+    that is set after the ingest has finished expires. The object ID in the
+    permanent bucket is taken from the file registry document, so the bucket is
+    only polled for files that have been registered. The bucket is polled with
+    a single listing of its objects per round instead of one request per file,
+    so that polling does not put a load on the object storage that grows with
+    the number of files. Latencies are measured when a poll returns, so they
+    can be too large by the time needed for one round.
+    """
+
+    def __init__(
+        self,
+        mongo: MongoFixture,
+        s3: S3Fixture,
+        config: Config,
+        accessions: Iterable[str],
+    ):
+        self.mongo = mongo
+        self.s3 = s3
+        self.config = config
+        self.accessions = sorted(accessions)
+        self.started = time.monotonic()
+        self.deadline: Optional[float] = None
+
+    def elapsed(self) -> float:
+        """Get the seconds since the start of the ingest."""
+        return time.monotonic() - self.started
+
+    def set_timeout(self, timeout: float) -> None:
+        """Stop tracking the given number of seconds from now."""
+        self.deadline = self.elapsed() + timeout
+
+    async def track(self, interval: float = INTERVAL) -> list[IngestLatency]:
+        """Poll until all files are in the permanent bucket or the timeout expires.
+
+        Files that did not become available within the timeout get None as latency.
+        """
+        config = self.config
+        object_ids: dict[str, str] = {}
+        registered: dict[str, float] = {}
+        stored: dict[str, float] = {}
+        while True:
+            unregistered = [
+                accession
+                for accession in self.accessions
+                if accession not in registered
+            ]
+            if unregistered:
+                documents = await asyncio.to_thread(
+                    self.mongo.find_documents,
+                    db_name=config.ifrs_db_name,
+                    collection_name=config.ifrs_metadata_collection,
+                    mapping={"_id": {"$in": unregistered}},
+                )
+                elapsed = self.elapsed()
+                for document in documents:
+                    registered[document["_id"]] = elapsed
+                    object_ids[document["_id"]] = document["object_id"]
+
+            unstored = [
+                accession for accession in object_ids if accession not in stored
+            ]
+            if unstored:
+                existing_ids = set(
+                    await self.s3.storage.list_all_object_ids(
+                        bucket_id=config.permanent_bucket
+                    )
+                )
+                elapsed = self.elapsed()
+                for accession in unstored:
+                    if object_ids[accession] in existing_ids:
+                        stored[accession] = elapsed
+
+            if len(stored) == len(self.accessions) or (
+                self.deadline is not None and self.elapsed() >= self.deadline
+            ):
+                break
+            await asyncio.sleep(interval)
+
+        return [
+            IngestLatency(
+                accession=accession,
+                object_id=object_ids.get(accession),
+                registered=registered.get(accession),
+                stored=stored.get(accession),
+            )
+            for accession in self.accessions
+        ]
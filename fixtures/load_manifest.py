@@ -0,0 +1,117 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Manifest of the artifacts that have been loaded into the system"""
+
+import json
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from ghga_datasteward_kit.loading import LoadConfig
+from metldata.event_handling.artifact_events import get_artifact_topic
+
+from fixtures.utils import calculate_file_checksum
+
+__all__ = ["ArtifactChanges", "LoadManifest"]
+
+
+class ArtifactChanges(NamedTuple):
+    """Artifact files that changed since the last load"""
+
+    added: list[str]
+    changed: list[str]
+    deleted: list[str]
+
+    def __bool__(self) -> bool:
+        """Check whether there are any changes."""
+        return bool(self.added or self.changed or self.deleted)
+
+
+class LoadManifest:
+    """Digests of the artifact files that have been loaded with a load config.
+
+    The manifest is used to find out whether the artifacts in the event store
+    have changed since they were last loaded into the system. The digests of
+    unchanged files are reused, so only new and modified files need to be read.
+    The loader API expects the complete set of artifacts in every load, so the
+    manifest can only tell whether a load is needed at all. A load is always
+    needed if nothing has been loaded to the same loader API before.
+    """
+
+    def __init__(self, path: Path, load_config: LoadConfig):
+        self.path = path
+        self.target = str(load_config.loader_api_root)
+        self.topic_dirs = [
+            load_config.event_store_path
+            / get_artifact_topic(
+                artifact_topic_prefix=load_config.artifact_topic_prefix,
+                artifact_type=artifact_type,
+            )
+            for artifact_type in load_config.artifact_types
+        ]
+        self.event_store = load_config.event_store_path
+        self.loaded = self._read()
+        self.current = self._scan()
+
+    def _read(self) -> Optional[dict[str, list]]:
+        """Read the artifact files of the last load to the same target."""
+        try:
+            manifest = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return None
+        if manifest.get("target") != self.target:
+            return None
+        return manifest.get("artifacts")
+
+    def _scan(self) -> dict[str, list]:
+        """Get the size, modification time and digest of all artifact files."""
+        artifacts: dict[str, list] = {}
+        for topic_dir in self.topic_dirs:
+            for artifact_path in sorted(topic_dir.glob("*.json")):
+                name = str(artifact_path.relative_to(self.event_store))
+                stat = artifact_path.stat()
+                size, mtime = stat.st_size, stat.st_mtime_ns
+                loaded = self.loaded.get(name) if self.loaded else None
+                if loaded and loaded[:2] == [size, mtime]:
+                    digest = loaded[2]
+                else:
+                    digest = calculate_file_checksum(artifact_path)
+                artifacts[name] = [size, mtime, digest]
+        return artifacts
+
+    def changes(self) -> ArtifactChanges:
+        """Get the artifact files that changed since the last load."""
+        loaded, current = self.loaded or {}, self.current
+        return ArtifactChanges(
+            added=sorted(current.keys() - loaded.keys()),
+            changed=sorted(
+                name
+                for name in current.keys() & loaded.keys()
+                if current[name][2] != loaded[name][2]
+            ),
+            deleted=sorted(loaded.keys() - current.keys()),
+        )
+
+    def needs_load(self) -> bool:
+        """Check whether the artifacts need to be loaded."""
+        return self.loaded is None or bool(self.changes())
+
+    def save(self) -> None:
+        """Remember the current artifact files as loaded."""
+        self.path.write_text(
+            json.dumps({"target": self.target, "artifacts": self.current})
+        )
+        self.loaded = self.current
@@ -0,0 +1,274 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Utilities for handling research metadata files"""
+
+import filecmp
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import ijson
+from pytest import fixture
+
+from fixtures.config import Config
+from fixtures.content import content_digest
+from fixtures.dsk import DskFixture
+from fixtures.file_cache import get_digest_table
+from fixtures.file_sizes import file_size
+from fixtures.metadata_generator import JsonStreamWriter
+
+__all__ = [
+    "MetadataFiles",
+    "MetadataIndex",
+    "iter_file_records",
+    "metadata_index_fixture",
+    "prepare_metadata",
+]
+
+
+# settings that determine the sizes and checksums in the prepared metadata
+PREPARED_SETTINGS = (
+    "file_content_profile",
+    "file_content_seed",
+    "file_size_profile",
+    "file_size_seed",
+    "file_size_median",
+    "file_size_sigma",
+    "file_size_small",
+    "file_size_medium",
+    "file_size_small_share",
+    "file_size_max",
+)
+
+_prepared_lock = threading.Lock()
+_prepared_signatures: dict[tuple[Any, ...], tuple[int, int]] = {}
+
+
+def file_signature(path: Path) -> tuple[int, int]:
+    """Get the modification time and the size of the given file."""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def prepare_metadata(
+    metadata_path: Path, config: Config, file_fields: Iterable[str]
+) -> Path:
+    """Get the path of metadata that matches the generated files.
+
+    If the configured content profile is not the default zeros profile or the
+    configured size profile is not the default metadata profile, a copy of the
+    metadata with the sizes and checksums of the generated files is stored in the
+    test directory, and its path is returned instead of the original path.
+    The copy is only prepared once for unchanged metadata and settings, and only
+    rewritten if its content changes, so that its modification time stays the same
+    and the metadata index does not need to parse it again.
+    """
+    if (
+        config.file_content_profile == "zeros"
+        and config.file_size_profile == "metadata"
+    ):
+        return metadata_path
+
+    file_fields = tuple(file_fields)
+    prepared_path = config.test_dir / "metadata" / metadata_path.name
+    settings = tuple(getattr(config, name) for name in PREPARED_SETTINGS)
+    prepared_key = (
+        metadata_path.resolve(),
+        file_signature(metadata_path),
+        file_fields,
+        settings,
+        prepared_path,
+    )
+    with _prepared_lock:
+        signature = _prepared_signatures.get(prepared_key)
+        if (
+            signature
+            and prepared_path.exists()
+            and file_signature(prepared_path) == signature
+        ):
+            return prepared_path
+        write_prepared_metadata(metadata_path, prepared_path, config, file_fields)
+        _prepared_signatures[prepared_key] = file_signature(prepared_path)
+    return prepared_path
+
+
+def write_prepared_metadata(
+    metadata_path: Path, prepared_path: Path, config: Config, file_fields: Iterable[str]
+) -> None:
+    """Write a copy of the metadata with the sizes and checksums of generated files.
+
+    The metadata is streamed record by record, so that memory usage does not
+    depend on its size. The copy replaces an existing copy only if it differs.
+    """
+    file_fields = set(file_fields)
+
+    def prepared_records(records: Iterable[dict[str, Any]]):
+        for record in records:
+            record["size"] = file_size(record["name"], record["size"], config)
+            record["checksum"] = content_digest(record["name"], record["size"], config)
+            yield record
+
+    prepared_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = prepared_path.with_suffix(".tmp")
+    with JsonStreamWriter(tmp_path) as writer:
+        for key, records in iter_metadata_arrays(metadata_path):
+            if key in file_fields:
+                records = prepared_records(records)
+            writer.write_array(key, records)
+    get_digest_table(config.file_digest_table).flush()
+
+    if prepared_path.exists() and filecmp.cmp(tmp_path, prepared_path, shallow=False):
+        tmp_path.unlink()
+    else:
+        os.replace(tmp_path, prepared_path)
+
+
+def iter_array_records(
+    events: Iterator[tuple[str, str, Any]],
+) -> Iterator[dict[str, Any]]:
+    """Yield the records of the JSON array that starts with the given parse events."""
+    _, event, _ = next(events)
+    if event != "start_array":
+        raise ValueError("The metadata must only contain arrays of records")
+    builder = None
+    depth = 0
+    for _, event, value in events:
+        if builder is None:
+            if event == "end_array":
+                return
+            builder = ijson.ObjectBuilder()
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+        if not depth:
+            yield builder.value
+            builder = None
+
+
+def iter_metadata_arrays(
+    metadata_path: Path,
+) -> Iterator[tuple[str, Iterator[dict[str, Any]]]]:
+    """Yield the keys and the records of the arrays of a metadata file.
+
+    The metadata file is parsed incrementally, and the records of every array
+    are only built when they are consumed, so that memory usage does not depend
+    on the size of the file. Arrays that are not consumed are skipped.
+    """
+    with open(metadata_path, "rb") as metadata_file:
+        events = ijson.parse(metadata_file, use_float=True)
+        for prefix, event, value in events:
+            if event == "map_key" and not prefix:
+                yield value, iter_array_records(events)
+
+
+def iter_file_items(
+    metadata_path: Path, file_fields: Iterable[str]
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield the file fields and records of the given fields from a metadata file.
+
+    The metadata file is parsed incrementally, and only the file records
+    are built, so that memory usage does not depend on the size of the file.
+    The records are yielded in the order in which they appear in the file.
+    """
+    file_fields = set(file_fields)
+    for file_field, records in iter_metadata_arrays(metadata_path):
+        if file_field in file_fields:
+            for record in records:
+                yield file_field, record
+
+
+def iter_file_records(
+    metadata_path: Path, file_fields: Iterable[str]
+) -> Iterator[dict[str, Any]]:
+    """Yield the file records of the given fields from a metadata file.
+
+    The metadata file is parsed incrementally, see iter_file_items().
+    """
+    for _, record in iter_file_items(metadata_path, file_fields):
+        yield record
+
+
+class MetadataFiles:
+    """Lookup tables for the file records of a metadata file"""
+
+    def __init__(self, items: Iterable[tuple[str, dict[str, Any]]]):
+        self.records: dict[str, dict[str, Any]] = {}
+        self.aliases_by_dataset: dict[str, list[str]] = {}
+        self.aliases_by_field: dict[str, list[str]] = {}
+        for file_field, record in items:
+            alias = record["alias"]
+            self.records[alias] = record
+            self.aliases_by_dataset.setdefault(record["dataset"], []).append(alias)
+            self.aliases_by_field.setdefault(file_field, []).append(alias)
+
+    def __len__(self) -> int:
+        """Get the number of file records."""
+        return len(self.records)
+
+    def file_records(self) -> list[dict[str, Any]]:
+        """Get all file records in the order of the metadata file."""
+        return list(self.records.values())
+
+    def dataset_records(self, dataset: str) -> list[dict[str, Any]]:
+        """Get the file records of the dataset with the given alias."""
+        aliases = self.aliases_by_dataset.get(dataset, [])
+        return [self.records[alias] for alias in aliases]
+
+    def field_records(self, file_field: str) -> list[dict[str, Any]]:
+        """Get the file records of the given file field."""
+        aliases = self.aliases_by_field.get(file_field, [])
+        return [self.records[alias] for alias in aliases]
+
+
+class MetadataIndex:
+    """Index of the file records of metadata files.
+
+    Every metadata file is parsed only once, unless it has been modified,
+    which is detected by comparing the modification time and the size of the file.
+    The index holds all file records in memory, so it is only used for lookups
+    by dataset, like in the dataset summary steps. The file fixtures stream
+    the file records with iter_file_records() instead.
+    """
+
+    def __init__(self, file_fields: Iterable[str]):
+        self.file_fields = tuple(file_fields)
+        self._lock = threading.Lock()
+        self._entries: dict[Path, tuple[tuple[int, int], MetadataFiles]] = {}
+
+    def files(self, metadata_path: Path) -> MetadataFiles:
+        """Get the lookup tables for the file records of the given metadata file."""
+        metadata_path = metadata_path.resolve()
+        signature = file_signature(metadata_path)
+        with self._lock:
+            entry = self._entries.get(metadata_path)
+            if entry and entry[0] == signature:
+                return entry[1]
+            metadata_files = MetadataFiles(
+                iter_file_items(metadata_path, self.file_fields)
+            )
+            self._entries[metadata_path] = (signature, metadata_files)
+        return metadata_files
+
+
+@fixture(name="metadata_index", scope="session")
+def metadata_index_fixture(dsk: DskFixture) -> MetadataIndex:
+    """Fixture that provides an index of the file records of metadata files."""
+    return MetadataIndex(dsk.config.metadata_file_fields)
@@ -0,0 +1,363 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Generator for synthetic research metadata of arbitrary size
+
+The generated submissions have the same structure as the complete example
+metadata, whose records are used as templates, so that they conform to the
+metadata model. The records are written one by one, so that even submissions
+with millions of files are never held in memory.
+
+Submissions can also be generated from the command line, for example:
+
+    python -m fixtures.metadata_generator --datasets 10 output.json
+"""
+
+import argparse
+import hashlib
+import json
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from pydantic import BaseModel, Field
+
+from fixtures.content import zero_padded_chunks
+
+__all__ = ["JsonStreamWriter", "MetadataGenerator", "MetadataScale"]
+
+Record = dict[str, Any]
+
+TEMPLATE_PATH = (
+    Path(__file__).parent.parent
+    / "example_data"
+    / "metadata"
+    / "complete_metadata.json"
+)
+
+CHUNK_SIZE = 1024**2  # chunk size for computing the checksums of the files
+
+
+class MetadataScale(BaseModel):
+    """Size of a generated submission"""
+
+    datasets: int = Field(default=1, ge=1, description="number of datasets and studies")
+    samples_per_dataset: int = Field(
+        default=2, ge=1, description="number of samples and individuals per dataset"
+    )
+    files_per_sample: int = Field(
+        default=2, ge=1, description="number of sequencing process files per sample"
+    )
+    file_size: int = Field(
+        default=1024, ge=1, description="size of every generated file"
+    )
+    title: str = Field(default="Generated", description="prefix for the dataset titles")
+
+    @property
+    def num_files(self) -> int:
+        """Get the total number of files in the submission.
+
+        Every sample has one analysis output file in addition to its sequencing
+        process files, and every study has one study file.
+        """
+        files_per_dataset = self.samples_per_dataset * (self.files_per_sample + 1) + 1
+        return self.datasets * files_per_dataset
+
+
+class JsonStreamWriter:
+    """Writer for a file with a JSON object consisting of arrays of records.
+
+    The arrays are written record by record, so they are never held in memory.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._file: Optional[TextIO] = None
+        self._num_keys = 0
+
+    def __enter__(self) -> "JsonStreamWriter":
+        """Open the file and start writing the JSON object."""
+        self._file = open(self._path, "w", encoding="utf-8")  # noqa: SIM115
+        self._file.write("{")
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Finish writing the JSON object and close the file."""
+        if self._file:
+            self._file.write("\n}\n")
+            self._file.close()
+            self._file = None
+
+    def _write(self, text: str) -> None:
+        """Write text to the opened file."""
+        if not self._file:
+            raise RuntimeError("The writer must be used as a context manager")
+        self._file.write(text)
+
+    def write_array(self, key: str, records: Iterable[Record]) -> int:
+        """Write an array of records with the given key and return its length."""
+        separator = "," if self._num_keys else ""
+        self._write(f"{separator}\n  {json.dumps(key)}: [")
+        self._num_keys += 1
+        num_records = 0
+        for record in records:
+            separator = "," if num_records else ""
+            self._write(f"{separator}\n    {json.dumps(record)}")
+            num_records += 1
+        self._write("\n  ]" if num_records else "]")
+        return num_records
+
+
+class MetadataGenerator:
+    """Generator for a synthetic submission of the given scale.
+
+    Every dataset has its own study, condition, publication and data access policy,
+    and every sample has its own individual, biospecimen, sequencing process and
+    analysis process. The protocols, the sequencing experiment, the analysis and
+    the data access committee are shared by all datasets.
+    """
+
+    def __init__(self, scale: MetadataScale, template_path: Path = TEMPLATE_PATH):
+        self.scale = scale
+        templates = json.loads(template_path.read_text())
+        self._templates: dict[str, Record] = {
+            key: records[-1] for key, records in templates.items() if records
+        }
+
+    def write(self, output_path: Path) -> None:
+        """Write the submission to the given path."""
+        generators: dict[str, Callable[[], Iterator[Record]]] = {
+            "analyses": self._analyses,
+            "analysis_process_output_files": self._analysis_process_output_files,
+            "analysis_processes": self._analysis_processes,
+            "biospecimens": self._biospecimens,
+            "conditions": self._conditions,
+            "data_access_committees": self._data_access_committees,
+            "data_access_policies": self._data_access_policies,
+            "datasets": self._datasets,
+            "individuals": self._individuals,
+            "library_preparation_protocols": self._library_preparation_protocols,
+            "publications": self._publications,
+            "sample_files": self._no_records,
+            "samples": self._samples,
+            "sequencing_experiments": self._sequencing_experiments,
+            "sequencing_process_files": self._sequencing_process_files,
+            "sequencing_processes": self._sequencing_processes,
+            "sequencing_protocols": self._sequencing_protocols,
+            "studies": self._studies,
+            "study_files": self._study_files,
+            "trios": self._no_records,
+        }
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with JsonStreamWriter(output_path) as writer:
+            for key, generator in generators.items():
+                writer.write_array(key, generator())
+
+    def _record(self, key: str, **fields: Any) -> Record:
+        """Create a record from the template for the given key."""
+        return {**self._templates[key], **fields}
+
+    def _datasets_and_samples(self) -> Iterator[tuple[int, int]]:
+        """Iterate over all datasets and their samples."""
+        for dataset in range(1, self.scale.datasets + 1):
+            for sample in range(1, self.scale.samples_per_dataset + 1):
+                yield dataset, sample
+
+    def _file(self, key: str, name: str, dataset: int, **fields: Any) -> Record:
+        """Create a file record with the size and checksum of the generated file."""
+        size = self.scale.file_size
+        hasher = hashlib.sha256()
+        for chunk in zero_padded_chunks(name, size, chunk_size=CHUNK_SIZE):
+            hasher.update(chunk)
+        return self._record(
+            key,
+            name=name,
+            size=size,
+            checksum=hasher.hexdigest(),
+            dataset=f"DS_{dataset}",
+            **fields,
+        )
+
+    @staticmethod
+    def _no_records() -> Iterator[Record]:
+        """Yield no records for classes that are not generated."""
+        yield from ()
+
+    def _analyses(self) -> Iterator[Record]:
+        yield self._record("analyses", alias="ANALYSIS_1")
+
+    def _data_access_committees(self) -> Iterator[Record]:
+        yield self._record("data_access_committees", alias="DAC_1")
+
+    def _library_preparation_protocols(self) -> Iterator[Record]:
+        yield self._record("library_preparation_protocols", alias="LIB_PREP_1")
+
+    def _sequencing_experiments(self) -> Iterator[Record]:
+        yield self._record(
+            "sequencing_experiments",
+            alias="SEQ_EXP_1",
+            library_preparation_protocol="LIB_PREP_1",
+            sequencing_protocol="SEQ_PRO_1",
+        )
+
+    def _sequencing_protocols(self) -> Iterator[Record]:
+        yield self._record("sequencing_protocols", alias="SEQ_PRO_1")
+
+    def _studies(self) -> Iterator[Record]:
+        for dataset in range(1, self.scale.datasets + 1):
+            yield self._record(
+                "studies",
+                alias=f"STUDY_{dataset}",
+                title=f"{self.scale.title} study {dataset}",
+                description=f"Generated study {dataset}",
+            )
+
+    def _conditions(self) -> Iterator[Record]:
+        for dataset in range(1, self.scale.datasets + 1):
+            yield self._record(
+                "conditions", alias=f"COND_{dataset}", study=f"STUDY_{dataset}"
+            )
+
+    def _publications(self) -> Iterator[Record]:
+        for dataset in range(1, self.scale.datasets + 1):
+            yield self._record(
+                "publications",
+                alias=f"PUB_{dataset}",
+                doi=f"10.0000/generated.{dataset}",
+                study=f"STUDY_{dataset}",
+            )
+
+    def _data_access_policies(self) -> Iterator[Record]:
+        for dataset in range(1, self.scale.datasets + 1):
+            yield self._record(
+                "data_access_policies",
+                alias=f"DAP_{dataset}",
+                data_access_committee="DAC_1",
+            )
+
+    def _datasets(self) -> Iterator[Record]:
+        for dataset in range(1, self.scale.datasets + 1):
+            yield self._record(
+                "datasets",
+                alias=f"DS_{dataset}",
+                data_access_policy=f"DAP_{dataset}",
+                title=f"{self.scale.title} dataset {dataset}",
+                description=f"Generated dataset {dataset}",
+            )
+
+    def _individuals(self) -> Iterator[Record]:
+        for dataset, sample in self._datasets_and_samples():
+            yield self._record("individuals", alias=f"INDV_{dataset}_{sample}")
+
+    def _biospecimens(self) -> Iterator[Record]:
+        for dataset, sample in self._datasets_and_samples():
+            yield self._record(
+                "biospecimens",
+                alias=f"BIOSPECIMEN_{dataset}_{sample}",
+                individual=f"INDV_{dataset}_{sample}",
+            )
+
+    def _samples(self) -> Iterator[Record]:
+        for dataset, sample in self._datasets_and_samples():
+            yield self._record(
+                "samples",
+                alias=f"SAMPLE_{dataset}_{sample}",
+                biospecimen=f"BIOSPECIMEN_{dataset}_{sample}",
+                condition=f"COND_{dataset}",
+            )
+
+    def _sequencing_processes(self) -> Iterator[Record]:
+        for dataset, sample in self._datasets_and_samples():
+            yield self._record(
+                "sequencing_processes",
+                alias=f"SEQ_PROCESS_{dataset}_{sample}",
+                sample=f"SAMPLE_{dataset}_{sample}",
+                sequencing_experiment="SEQ_EXP_1",
+            )
+
+    def _sequencing_process_file_aliases(self, dataset: int, sample: int) -> list[str]:
+        return [
+            f"SEQ_FILE_{dataset}_{sample}_{file}"
+            for file in range(1, self.scale.files_per_sample + 1)
+        ]
+
+    def _sequencing_process_files(self) -> Iterator[Record]:
+        for dataset, sample in self._datasets_and_samples():
+            aliases = self._sequencing_process_file_aliases(dataset, sample)
+            for file, alias in enumerate(aliases, 1):
+                yield self._file(
+                    "sequencing_process_files",
+                    name=f"SAMPLE_{dataset}_{sample}_FILE_{file}.fastq.gz",
+                    dataset=dataset,
+                    alias=alias,
+                    sequencing_process=f"SEQ_PROCESS_{dataset}_{sample}",
+                )
+
+    def _analysis_processes(self) -> Iterator[Record]:
+        for dataset, sample in self._datasets_and_samples():
+            yield self._record(
+                "analysis_processes",
+                alias=f"ANALYSIS_PROCESS_{dataset}_{sample}",
+                analysis="ANALYSIS_1",
+                sequencing_process_input_files=self._sequencing_process_file_aliases(
+                    dataset, sample
+                ),
+            )
+
+    def _analysis_process_output_files(self) -> Iterator[Record]:
+        for dataset, sample in self._datasets_and_samples():
+            yield self._file(
+                "analysis_process_output_files",
+                name=f"SAMPLE_{dataset}_{sample}.vcf.gz",
+                dataset=dataset,
+                alias=f"OUTPUT_{dataset}_{sample}",
+                analysis_process=f"ANALYSIS_PROCESS_{dataset}_{sample}",
+            )
+
+    def _study_files(self) -> Iterator[Record]:
+        for dataset in range(1, self.scale.datasets + 1):
+            yield self._file(
+                "study_files",
+                name=f"STUDY_{dataset}_FILE.fastq.gz",
+                dataset=dataset,
+                alias=f"STUDY_FILE_{dataset}",
+                study=f"STUDY_{dataset}",
+            )
+
+
+def run():
+    """Generate a submission from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="metadata-generator",
+        description="Generate synthetic research metadata of the given size.",
+    )
+    parser.add_argument("output_path", type=Path, help="path of the output file")
+    for name, field in MetadataScale.model_fields.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=field.annotation or str,
+            default=field.default,
+            help=f"{field.description} (default: {field.default})",
+        )
+    args = vars(parser.parse_args())
+    output_path = args.pop("output_path")
+    scale = MetadataScale(**args)
+    MetadataGenerator(scale).write(output_path)
+    print(f"Generated {scale.num_files} files in {scale.datasets} datasets.")
+
+
+if __name__ == "__main__":
+    run()
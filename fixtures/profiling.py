@@ -0,0 +1,141 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Sampling profiler with output as folded stacks and flame graphs"""
+
+import sys
+import threading
+import zlib
+from collections import Counter
+from collections.abc import Callable
+from html import escape
+from pathlib import Path
+from types import FrameType
+from typing import Optional
+
+__all__ = ["SamplingProfiler", "flame_graph_svg", "write_folded_stacks"]
+
+FRAME_HEIGHT = 16  # height of a frame in the flame graph in pixels
+GRAPH_WIDTH = 1200  # width of the flame graph in pixels
+MIN_FRAME_WIDTH = 0.1  # frames that are narrower are omitted from the flame graph
+
+
+def frame_name(frame: FrameType) -> str:
+    """Get the name of the function of the given frame including its module."""
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+class SamplingProfiler:
+    """Profiler that samples the call stack of a thread in regular intervals.
+
+    The samples are counted per call stack, which can be written as folded stacks
+    and rendered as a flame graph. Sampling happens in a background thread,
+    so the profiled code does not need to be changed and runs at nearly full speed.
+    If a label function is passed, its result is used as root of the call stacks.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        thread_id: Optional[int] = None,
+        label: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.label = label
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> "SamplingProfiler":
+        """Start sampling."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        """Sample the call stack of the profiled thread until stopped."""
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+            label = self.label() if self.label else None
+            if label:
+                names.append(label)
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+def write_folded_stacks(stacks: Counter[str], path: Path) -> None:
+    """Write the sampled call stacks in the folded format used by flame graph tools."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as folded_file:
+        for stack, count in stacks.most_common():
+            folded_file.write(f"{stack} {count}\n")
+
+
+def flame_graph_svg(stacks: Counter[str], title: str = "Flame Graph") -> str:
+    """Render the sampled call stacks as a flame graph in SVG format.
+
+    The root of the call stacks is at the bottom, and the width of every frame
+    is proportional to the number of samples in which it was on the call stack.
+    """
+    tree: dict = {}
+    for stack, count in stacks.items():
+        node = tree
+        for name in stack.split(";"):
+            child = node.setdefault(name, [0, {}])
+            child[0] += count
+            node = child[1]
+
+    total = sum(stacks.values()) or 1
+    scale = GRAPH_WIDTH / total
+    depth = max((stack.count(";") + 1 for stack in stacks), default=0)
+    height = (depth + 2) * FRAME_HEIGHT
+    rects: list[str] = []
+
+    def add_frames(node: dict, x: float, level: int) -> None:
+        for name, (count, children) in sorted(node.items()):
+            width = count * scale
+            if width >= MIN_FRAME_WIDTH:
+                y = height - (level + 1) * FRAME_HEIGHT
+                hue = 10 + zlib.crc32(name.split(":", 1)[0].encode()) % 50
+                label = escape(name) if width > 7 * len(name) else ""
+                rects.append(
+                    f"<g><title>{escape(name)} ({count} samples,"
+                    f" {100 * count / total:.2f}%)</title>"
+                    f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}"'
+                    f' height="{FRAME_HEIGHT - 1}" fill="hsl({hue},80%,60%)"/>'
+                    f'<text x="{x + 2:.1f}" y="{y + FRAME_HEIGHT - 4}">{label}</text>'
+                    "</g>"
+                )
+                add_frames(children, x, level + 1)
+            x += width
+
+    add_frames(tree, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{GRAPH_WIDTH}"'
+        f' height="{height}" font-family="monospace" font-size="11">'
+        f'<text x="{GRAPH_WIDTH / 2}" y="{FRAME_HEIGHT - 2}" text-anchor="middle">'
+        f"{escape(title)} ({total} samples)</text>" + "".join(rects) + "</svg>\n"
+    )
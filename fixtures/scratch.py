@@ -0,0 +1,65 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Scratch space for the working directories and files of the test bed"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from fixtures.config import Config
+
+__all__ = ["check_scratch_space", "get_scratch_dir"]
+
+MEMORY_DIR = Path("/dev/shm")  # noqa: S108
+
+
+def get_scratch_dir(config: Config) -> Path:
+    """Get the directory for scratch files.
+
+    This is the configured scratch directory, or a memory-backed file system
+    if scratch files shall be kept in memory, or the temporary directory.
+    """
+    if config.scratch_dir:
+        scratch_dir = config.scratch_dir
+    elif config.scratch_in_memory:
+        if not MEMORY_DIR.is_dir():
+            raise RuntimeError(f"No memory-backed file system found at {MEMORY_DIR}")
+        scratch_dir = MEMORY_DIR / "testbed"
+    else:
+        return Path(tempfile.gettempdir())
+    scratch_dir.mkdir(parents=True, exist_ok=True)
+    return scratch_dir
+
+
+def check_scratch_space(scratch_dir: Path, required_size: int, config: Config) -> None:
+    """Check that the given number of bytes can be stored in the scratch directory.
+
+    The required size must not exceed the scratch budget if one has been configured,
+    and it must not exceed the free space of the underlying file system.
+    """
+    budget = config.scratch_budget
+    if budget is not None and required_size > budget:
+        raise RuntimeError(
+            f"Scratch files need {required_size} bytes,"
+            f" but the scratch budget is only {budget} bytes"
+        )
+    free_size = shutil.disk_usage(scratch_dir).free
+    if required_size > free_size:
+        raise RuntimeError(
+            f"Scratch files need {required_size} bytes,"
+            f" but only {free_size} bytes are free in {scratch_dir}"
+        )
@@ -0,0 +1,138 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Persistent cache for the output of the metadata transformation"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Iterator, Sequence
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Optional
+from uuid import uuid4
+
+from pytest import fixture
+
+from fixtures.config import Config
+
+__all__ = ["TransformCache", "transform_cache_fixture"]
+
+
+class TransformCache:
+    """Cache for the stores produced by the submission and the transformation.
+
+    The submission store, the accession store and the event store are cached
+    together, so that the accessions in the restored stores are consistent.
+    They are stored under a key derived from the submitted metadata, the metadata
+    config, the metadata model and the version of the datasteward-kit. The IDs,
+    accessions and timestamps that the datasteward-kit assigns to submissions are
+    not part of the key, so the cache also hits when the same metadata has been
+    submitted again.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(submission_store: Path, *paths: Path) -> str:
+        """Get the cache key for the submissions in the given store and files."""
+        hasher = hashlib.sha256()
+        hasher.update(version("ghga-datasteward-kit").encode())
+        for submission in submitted_metadata(submission_store):
+            hasher.update(b"\0" + json.dumps(submission, sort_keys=True).encode())
+        for path in paths:
+            hasher.update(f"\0{path.name}\0{path.stat().st_size}\0".encode())
+            with open(path, "rb") as file:
+                while chunk := file.read(1024**2):
+                    hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def restore(self, key: str, stores: Sequence[Path]) -> bool:
+        """Restore the cached stores with the given key.
+
+        The cached stores are first copied next to the given stores, which are
+        then replaced by renaming, so that they are never left incomplete.
+        Returns False if no stores with the given key have been cached.
+        """
+        cached_path = self.cache_dir / key
+        if not cached_path.is_dir():
+            return False
+        # On a hit, the submission store and the accession store that have just
+        # been written by the submission are replaced as well, since the cached
+        # event store refers to the cached accessions. Later steps, like the file
+        # upload and ingest, therefore see the accessions of the cached submission.
+        tmp_path = stores[0].with_name(f"cached.{uuid4().hex}")
+        shutil.copytree(cached_path, tmp_path)
+        try:
+            for store in stores:
+                replace_path(tmp_path / store.name, store)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return True
+
+    def store(self, key: str, stores: Sequence[Path]) -> None:
+        """Store the given stores under the given key."""
+        tmp_path = self.cache_dir / f"{key}.{uuid4().hex}"
+        tmp_path.mkdir()
+        for store in stores:
+            if store.is_dir():
+                shutil.copytree(store, tmp_path / store.name)
+            else:
+                shutil.copy2(store, tmp_path / store.name)
+        replace_path(tmp_path, self.cache_dir / key)
+
+
+def submitted_metadata(submission_store: Path) -> Iterator[dict[str, Any]]:
+    """Get the submitted metadata of the submissions in the given store.
+
+    The submissions are ordered by the time they were created, and only
+    the title, the description and the content of every submission are used.
+    """
+    submissions = [
+        json.loads(path.read_text()) for path in submission_store.glob("*.json")
+    ]
+    submissions.sort(
+        key=lambda submission: submission["status_history"][0]["timestamp"]
+    )
+    for submission in submissions:
+        yield {
+            "title": submission["title"],
+            "description": submission.get("description"),
+            "content": submission.get("content"),
+        }
+
+
+def replace_path(source: Path, target: Path) -> None:
+    """Replace the target file or directory with the source using renames."""
+    old_path = target.with_name(f"{target.name}.{uuid4().hex}")
+    if target.exists():
+        os.rename(target, old_path)
+    os.rename(source, target)
+    if old_path.is_dir():
+        shutil.rmtree(old_path, ignore_errors=True)
+    elif old_path.exists():
+        old_path.unlink()
+
+
+@fixture(name="transform_cache", scope="session")
+def transform_cache_fixture(config: Config) -> Optional[TransformCache]:
+    """Fixture that provides the transform cache if it has been configured."""
+    if not config.transform_cache_dir:
+        return None
+    return TransformCache(cache_dir=config.transform_cache_dir)
@@ -0,0 +1,165 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Profiled execution of the metadata transformation of the datasteward-kit
+
+This module is meant to be run in a child interpreter, for example:
+
+    python -m fixtures.transform_profiler --config-path config.yaml --report-dir out
+
+It runs the transformation under a sampling profiler and writes the folded
+call stacks, a flame graph and the timing of the workflow steps to the
+report directory. The call stacks are grouped by the running workflow step.
+"""
+
+import argparse
+import logging
+import sys
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Optional
+
+from ghga_datasteward_kit import metadata
+from metldata.model_utils import metadata_validator
+from metldata.transform import handling
+from pydantic import BaseModel
+
+from fixtures.profiling import SamplingProfiler, flame_graph_svg, write_folded_stacks
+from fixtures.utils import write_report
+
+__all__ = ["StepTiming", "WorkflowStepTimer", "run"]
+
+REPORT_NAME = "transform_profile"
+
+
+class StepTiming(BaseModel):
+    """Timing of a step of the transformation workflow"""
+
+    step: str
+    setup_seconds: float = 0  # time for transforming the model and setting up
+    calls: int = 0  # number of transformed submissions
+    transform_seconds: float = 0  # time for transforming metadata including validation
+    validation_seconds: float = 0  # time for validating metadata
+
+
+class WorkflowStepTimer:
+    """Measures the time spent in the steps of the transformation workflow.
+
+    The steps of the workflow are instrumented by wrapping the functions
+    of metldata that resolve the workflow steps, run their transformations
+    and validate the metadata.
+    """
+
+    def __init__(self):
+        self.timings: dict[str, StepTiming] = {}
+        self.current_step: Optional[str] = None
+        self._step_names: dict[int, str] = {}
+
+    def _timing(self, step_name: str) -> StepTiming:
+        """Get the timing of the workflow step with the given name."""
+        if step_name not in self.timings:
+            self.timings[step_name] = StepTiming(step=step_name)
+        return self.timings[step_name]
+
+    def instrument(self) -> None:
+        """Wrap the functions of metldata that are used in the workflow."""
+        resolve_workflow_step = handling.resolve_workflow_step
+        transform_metadata = handling.TransformationHandler.transform_metadata
+        validate = metadata_validator.MetadataValidator.validate
+
+        @wraps(resolve_workflow_step)
+        def timed_resolve_workflow_step(*, step_name: str, **kwargs: Any):
+            self.current_step = step_name
+            start = perf_counter()
+            try:
+                resolved_step = resolve_workflow_step(step_name=step_name, **kwargs)
+            finally:
+                self._timing(step_name).setup_seconds += perf_counter() - start
+                self.current_step = None
+            self._step_names[id(resolved_step.transformation_handler)] = step_name
+            return resolved_step
+
+        @wraps(transform_metadata)
+        def timed_transform_metadata(handler, *args: Any, **kwargs: Any):
+            step_name = self._step_names.get(id(handler), "unknown")
+            self.current_step = step_name
+            start = perf_counter()
+            try:
+                return transform_metadata(handler, *args, **kwargs)
+            finally:
+                timing = self._timing(step_name)
+                timing.transform_seconds += perf_counter() - start
+                timing.calls += 1
+                self.current_step = None
+
+        @wraps(validate)
+        def timed_validate(validator, *args: Any, **kwargs: Any):
+            start = perf_counter()
+            try:
+                return validate(validator, *args, **kwargs)
+            finally:
+                if self.current_step:
+                    timing = self._timing(self.current_step)
+                    timing.validation_seconds += perf_counter() - start
+
+        handling.resolve_workflow_step = timed_resolve_workflow_step
+        handling.TransformationHandler.transform_metadata = timed_transform_metadata
+        metadata_validator.MetadataValidator.validate = timed_validate
+
+    def label(self) -> Optional[str]:
+        """Get the label of the currently running workflow step for the profiler."""
+        return f"step:{self.current_step}" if self.current_step else None
+
+
+def run():
+    """Run the metadata transformation with profiling from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="transform-profiler",
+        description="Run the metadata transformation under a sampling profiler.",
+    )
+    parser.add_argument("--config-path", type=Path, required=True)
+    parser.add_argument("--report-dir", type=Path, required=True)
+    parser.add_argument("--interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    timer = WorkflowStepTimer()
+    timer.instrument()
+    start = perf_counter()
+    with SamplingProfiler(interval=args.interval, label=timer.label) as profiler:
+        metadata.transform_metadata_from_path(config_path=args.config_path)
+    total_seconds = perf_counter() - start
+
+    report_dir = args.report_dir
+    write_folded_stacks(profiler.stacks, report_dir / f"{REPORT_NAME}.folded")
+    svg = flame_graph_svg(profiler.stacks, title="Metadata transformation")
+    (report_dir / f"{REPORT_NAME}.svg").write_text(svg, encoding="utf-8")
+    write_report(
+        report_dir,
+        REPORT_NAME,
+        {
+            "total_seconds": total_seconds,
+            "samples": sum(profiler.stacks.values()),
+            "interval": args.interval,
+            "steps": [timing.model_dump() for timing in timer.timings.values()],
+        },
+    )
+    print(f"Transformation profile written to {report_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    run()
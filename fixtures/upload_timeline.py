@@ -0,0 +1,150 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Timeline of the file uploads done with the datasteward-kit"""
+
+import json
+import threading
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+__all__ = ["UploadRecord", "UploadTimeline", "read_upload_record"]
+
+TIMELINE_NAME = "upload_timeline"
+
+# uploads of the same test session share this start time in the timeline
+RUN_STARTED = datetime.now(timezone.utc).isoformat()
+
+
+class UploadRecord(NamedTuple):
+    """Timing and size of the upload of a single file"""
+
+    alias: str
+    mode: str  # "individual" or "batch"
+    start: float  # seconds since the epoch
+    end: float  # seconds since the epoch
+    returncode: int
+    size_in_bytes: Optional[int] = None
+    encrypted_size: Optional[int] = None
+    part_size: Optional[int] = None  # in bytes
+    num_parts: Optional[int] = None
+
+    @property
+    def duration(self) -> float:
+        """Get the duration of the upload including its verification in seconds."""
+        return max(self.end - self.start, 0.0)
+
+    @property
+    def succeeded(self) -> bool:
+        """Check whether the upload succeeded and wrote its file metadata."""
+        return not self.returncode and self.num_parts is not None
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Get the throughput of the upload in MB/s."""
+        if not self.succeeded or not self.size_in_bytes or not self.duration:
+            return None
+        return self.size_in_bytes / self.duration / 1e6
+
+    @property
+    def seconds_per_part(self) -> Optional[float]:
+        """Get the average time needed for one part of the upload."""
+        if not self.succeeded or not self.num_parts:
+            return None
+        return self.duration / self.num_parts
+
+
+def read_upload_record(
+    alias: str,
+    mode: str,
+    start: float,
+    end: float,
+    returncode: int,
+    file_metadata_dir: Path,
+    file_path: Optional[Path] = None,
+) -> UploadRecord:
+    """Create an upload record with the sizes from the file metadata of the upload.
+
+    The number of parts is taken from the part checksums in the file metadata.
+    If no file metadata has been written, the size of the given file is used.
+    """
+    metadata_path = file_metadata_dir / f"{alias}.json"
+    try:
+        file_metadata = json.loads(metadata_path.read_text())
+    except (OSError, ValueError):
+        size = file_path.stat().st_size if file_path and file_path.exists() else None
+        return UploadRecord(alias, mode, start, end, returncode, size_in_bytes=size)
+    part_size = file_metadata["Part Size"]
+    return UploadRecord(
+        alias=alias,
+        mode=mode,
+        start=start,
+        end=end,
+        returncode=returncode,
+        size_in_bytes=int(file_metadata["Unencrypted file size"]),
+        encrypted_size=int(file_metadata["Encrypted file size"]),
+        part_size=int(part_size.rpartition(" MiB")[0]) * 1024**2,
+        num_parts=len(file_metadata["Encrypted file part checksums (MD5)"]),
+    )
+
+
+class UploadTimeline:
+    """Timeline of the file uploads in one test run.
+
+    Records can be added from several threads. When the timeline is written,
+    one JSON line per upload is appended to the timeline file in the report
+    directory, so that the uploads of several runs can be compared. Every line
+    contains the start time of the test session, the version of the
+    datasteward-kit and the given label, e.g. the versions of the services.
+    """
+
+    def __init__(self, report_dir: Path, label: Optional[str] = None):
+        self.path = report_dir / f"{TIMELINE_NAME}.jsonl"
+        self.run = {
+            "run_started": RUN_STARTED,
+            "dsk_version": version("ghga_datasteward_kit"),
+            "label": label,
+        }
+        self.records: list[UploadRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: UploadRecord) -> None:
+        """Add the given upload record."""
+        with self._lock:
+            self.records.append(record)
+
+    def entry(self, record: UploadRecord) -> dict[str, Any]:
+        """Get the timeline entry for the given upload record."""
+        return {
+            **self.run,
+            **record._asdict(),
+            "duration": record.duration,
+            "throughput_mb_s": record.throughput,
+            "seconds_per_part": record.seconds_per_part,
+        }
+
+    def write(self) -> Path:
+        """Append the recorded uploads ordered by start time and clear them."""
+        with self._lock:
+            records, self.records = self.records, []
+        records.sort(key=lambda record: record.start)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as timeline_file:
+            for record in records:
+                timeline_file.write(json.dumps(self.entry(record)) + "\n")
+        return self.path
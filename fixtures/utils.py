@@ -16,9 +16,13 @@
 """Utilities used in fixtures"""
 
 import hashlib
+import json
+import mmap
 import os
 import tempfile
 from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
 
 import yaml
 
@@ -45,6 +49,36 @@ def write_data_to_yaml(data: dict[str, str], file_path=None):
     return file_path
 
 
-def calculate_checksum(file_contents: bytes) -> str:
-    """Compute the SHA256 hash of a file."""
-    return hashlib.sha256(file_contents).hexdigest()
+def write_report(report_dir: Path, name: str, data: Any) -> Path:
+    """Write a machine-readable JSON report with the given name."""
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_path = report_dir / f"{name}.json"
+    report_path.write_text(json.dumps(data, indent=2, default=str))
+    return report_path
+
+
+def calculate_file_checksum(
+    file_path: Path, chunk_size: int = 8 * 1024**2, use_mmap: bool = False
+) -> str:
+    """Compute the SHA256 hash of a file without loading it into memory.
+
+    The file is either read in chunks of the given size into a reused buffer,
+    or it is memory-mapped and hashed in chunks of the given size.
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        if use_mmap and os.fstat(file.fileno()).st_size:
+            with mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped, memoryview(mapped) as view:
+                for offset in range(0, len(view), chunk_size):
+                    hasher.update(view[offset : offset + chunk_size])
+        else:
+            buffer = bytearray(chunk_size)
+            with memoryview(buffer) as view:
+                while True:
+                    size = file.readinto(buffer)
+                    if not size:
+                        break
+                    hasher.update(view[:size])
+    return hasher.hexdigest()
@@ -27,6 +27,7 @@ from fixtures import (  # noqa: RUF100
     HttpClient,
     JointFixture,
     KafkaFixture,
+    MetadataIndex,
     MongoFixture,
     Response,
     S3Fixture,
@@ -38,15 +39,19 @@ from fixtures import (  # noqa: RUF100
     connector_fixture,
     dsk_fixture,
     event_loop,
+    file_cache_fixture,
     file_fixture,
     http_fixture,
     joint_fixture,
     kafka_fixture,
+    metadata_index_fixture,
     mongo_fixture,
     s3_fixture,
     state_fixture,
+    transform_cache_fixture,
     vault_fixture,
 )
+from pytest import skip
 from pytest_bdd import (  # noqa: RUF100
     given,
     parsers,
@@ -205,6 +210,12 @@ def unset_state_clause(name: str, state: StateStorage):
     state.unset_state(name)
 
 
+@given("benchmarks are enabled")
+def benchmarks_enabled(config: Config):
+    if not config.run_benchmarks:
+        skip("benchmarks are not enabled")
+
+
 def empty_mail_server(fixtures: JointFixture):
     """Delete all e-mails from mail server"""
     fixtures.http.delete(f"{fixtures.config.mail_url}/api/v1/messages")
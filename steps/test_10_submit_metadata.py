@@ -20,6 +20,12 @@ import glob
 import os
 import subprocess
 from pathlib import Path
+from typing import cast
+
+from fixtures.config import DskRunnerMode
+from fixtures.dsk import DskFixture
+from fixtures.dsk_runner import DskRunner
+from fixtures.metadata import prepare_metadata
 
 from .conftest import JointFixture, given, parse, scenarios, then, when
 
@@ -27,6 +33,7 @@ scenarios("../features/10_submit_metadata.feature")
 
 
 def call_data_steward_kit_submit(
+    dsk: DskFixture,
     metadata_path: Path,
     metadata_config_path: Path,
     submission_title: str = "Test Submission",
@@ -36,9 +43,8 @@ def call_data_steward_kit_submit(
     """Call cli command 'ghga-datasteward-kit metadata submit'
     to submit metadata
     """
-    completed_submit = subprocess.run(  # nosec B607, B603
+    completed_submit = dsk.run(
         [
-            "ghga-datasteward-kit",
             "metadata",
             "submit",
             "--submission-title",
@@ -50,10 +56,6 @@ def call_data_steward_kit_submit(
             "--config-path",
             metadata_config_path,
         ],
-        capture_output=True,
-        check=False,
-        encoding="utf-8",
-        text=True,
         timeout=timeout,
     )
 
@@ -76,10 +78,15 @@ def metadata_config_exist(fixtures: JointFixture):
 @when(parse('"{name}" metadata is submitted to the submission store'))
 def submit_metadata(name: str, fixtures: JointFixture):
     workdir = fixtures.dsk.config.submission_registry
-    metadata_json_path = fixtures.dsk.config.metadata_dir / f"{name}_metadata.json"
+    metadata_json_path = prepare_metadata(
+        fixtures.dsk.config.metadata_dir / f"{name}_metadata.json",
+        fixtures.config,
+        fixtures.dsk.config.metadata_file_fields,
+    )
     cwd = os.getcwd()
     os.chdir(workdir)
     call_data_steward_kit_submit(
+        dsk=fixtures.dsk,
         metadata_path=metadata_json_path,
         metadata_config_path=fixtures.dsk.config.metadata_config_path,
     )
@@ -101,3 +108,22 @@ def submission_registry_exists(num: str, fixtures: JointFixture):
     assert (
         num_found == num_expected
     ), f"{num_found} submission JSON files found in '{submission_store}'"
+
+
+@when(
+    parse('the datasteward-kit is run with the "{mode}" runner'),
+    target_fixture="completed_command",
+)
+def run_with_runner(mode: str) -> subprocess.CompletedProcess:
+    runner = DskRunner(mode=cast(DskRunnerMode, mode))
+    try:
+        return runner.run(["metadata", "--help"], timeout=60)
+    finally:
+        runner.close()
+
+
+@then("the datasteward-kit command succeeds without errors")
+def command_succeeds(completed_command: subprocess.CompletedProcess):
+    assert not completed_command.returncode
+    assert "Usage" in completed_command.stdout
+    assert not completed_command.stderr
@@ -16,52 +16,185 @@
 
 """Step definitions for transforming metadata via the data-steward-kit"""
 
+import json
 import os
+import shutil
 import subprocess
+import sys
 from pathlib import Path
+from typing import Optional
 
-from .conftest import JointFixture, scenarios, then, when
+from fixtures.config import Config
+from fixtures.dsk import BASE_DIR, DskConfig, DskFixture
+from fixtures.metadata import prepare_metadata
+from fixtures.scratch import get_scratch_dir
+from fixtures.transform_cache import TransformCache
+from pytest import skip
+
+from .conftest import JointFixture, given, scenarios, then, when
+from .test_10_submit_metadata import call_data_steward_kit_submit
 
 scenarios("../features/11_transform_metadata.feature")
 
 
 def call_data_steward_kit_transform(
+    dsk: DskFixture,
     metadata_config_path: Path,
     timeout: int = 1800,  # this command may take more than 15 min
+    profile_report_dir: Optional[Path] = None,
+    profile_interval: float = 0.005,
 ):
     """Call cli command 'ghga-datasteward-kit metadata transform'
     to run the transformation workflow on submitted metadata
+
+    If a report directory for profiling is passed, the transformation is run
+    in a child interpreter under a sampling profiler instead, which writes
+    a flame graph and the timing of the workflow steps to this directory.
     """
-    completed_transform = subprocess.run(  # nosec B607, B603
-        [
-            "ghga-datasteward-kit",
-            "metadata",
-            "transform",
-            "--config-path",
-            str(metadata_config_path),
-        ],
-        capture_output=True,
-        check=True,
-        encoding="utf-8",
-        text=True,
-        timeout=timeout,
-    )
+    if profile_report_dir:
+        python_path = [str(BASE_DIR), os.environ.get("PYTHONPATH", "")]
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, python_path))}
+        completed_transform = subprocess.run(  # nosec B603
+            [
+                sys.executable,
+                "-m",
+                "fixtures.transform_profiler",
+                "--config-path",
+                str(metadata_config_path),
+                "--report-dir",
+                str(profile_report_dir),
+                "--interval",
+                str(profile_interval),
+            ],
+            capture_output=True,
+            check=False,
+            encoding="utf-8",
+            text=True,
+            timeout=timeout,
+            env=env,
+        )
+    else:
+        completed_transform = dsk.run(
+            ["metadata", "transform", "--config-path", metadata_config_path],
+            timeout=timeout,
+        )
+    completed_transform.check_returncode()
 
     assert not completed_transform.stdout
     assert "ERROR" not in completed_transform.stderr
 
 
-@when("submitted metadata is transformed")
-def transform_metadata(fixtures: JointFixture):
-    workdir = fixtures.dsk.config.submission_registry
+def transform_submitted_metadata(
+    dsk: DskFixture, config: Config, transform_cache: Optional[TransformCache]
+) -> bool:
+    """Transform the submitted metadata unless the result has been cached.
+
+    Returns True if the stores have been restored from the transform cache.
+    """
+    dsk_config = dsk.config
+    workdir = dsk_config.submission_registry
+    stores = [
+        dsk_config.submission_store,
+        dsk_config.accession_store,
+        dsk_config.event_store,
+    ]
+
+    cache_key = None
+    if transform_cache:
+        cache_key = transform_cache.key(
+            dsk_config.submission_store,
+            dsk_config.metadata_config_path,
+            workdir / dsk_config.metadata_model_file,
+        )
+        if transform_cache.restore(cache_key, stores):
+            return True
+
     cwd = os.getcwd()
     os.chdir(workdir)
-    call_data_steward_kit_transform(
-        metadata_config_path=fixtures.dsk.config.metadata_config_path
+    try:
+        call_data_steward_kit_transform(
+            dsk=dsk,
+            metadata_config_path=dsk_config.metadata_config_path,
+            profile_report_dir=config.report_dir if config.profile_transform else None,
+            profile_interval=config.profile_interval,
+        )
+    finally:
+        os.chdir(cwd)
+
+    if transform_cache and cache_key:
+        transform_cache.store(cache_key, stores)
+    return False
+
+
+@when("submitted metadata is transformed")
+def transform_metadata(
+    fixtures: JointFixture, transform_cache: Optional[TransformCache]
+):
+    transform_submitted_metadata(fixtures.dsk, fixtures.config, transform_cache)
+
+
+@given("the transform cache is configured")
+def transform_cache_configured(config: Config):
+    if not config.transform_cache_dir:
+        skip("the transform cache is not configured")
+
+
+@when(
+    "the same metadata is submitted and transformed twice",
+    target_fixture="cache_hits",
+)
+def submit_and_transform_twice(fixtures: JointFixture) -> list[bool]:
+    """Submit and transform the minimal metadata twice with an empty cache.
+
+    This is done in a separate submission registry and transform cache,
+    which are removed afterwards.
+    """
+    work_dir = get_scratch_dir(fixtures.config) / "transform_cache"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    dsk = DskFixture(config=DskConfig.in_dir(work_dir), runner=fixtures.dsk.runner)
+    transform_cache = TransformCache(cache_dir=work_dir / "cache")
+    config = fixtures.config.model_copy(update={"profile_transform": False})
+    metadata_path = prepare_metadata(
+        dsk.config.minimal_metadata_path, config, dsk.config.metadata_file_fields
     )
-    os.chdir(cwd)
+    cache_hits = []
+    try:
+        for _ in range(2):
+            dsk.reset_work_dir()
+            cwd = os.getcwd()
+            os.chdir(dsk.config.submission_registry)
+            try:
+                call_data_steward_kit_submit(
+                    dsk=dsk,
+                    metadata_path=metadata_path,
+                    metadata_config_path=dsk.config.metadata_config_path,
+                )
+            finally:
+                os.chdir(cwd)
+            cache_hits.append(
+                transform_submitted_metadata(dsk, config, transform_cache)
+            )
+            assert dsk.config.embedded_public_event.exists()
+            assert_accessions_are_consistent(dsk)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return cache_hits
+
+
+def assert_accessions_are_consistent(dsk: DskFixture):
+    """Check that the submissions only use accessions from the accession store."""
+    accessions = set(dsk.config.accession_store.read_text().split())
+    for path in dsk.config.submission_store.glob("*.json"):
+        accession_map = json.loads(path.read_text())["accession_map"]
+        for resources in accession_map.values():
+            assert set(resources.values()) <= accessions
 
 
 @then("the embedded_public event exists")
 def embedded_public_event_exists(fixtures: JointFixture):
     assert fixtures.dsk.config.embedded_public_event.exists()
+
+
+@then("the second transformation is taken from the cache")
+def second_transformation_is_cached(cache_hits: list[bool]):
+    assert cache_hits == [False, True]
@@ -16,15 +16,22 @@
 
 """Step definitions for uploading and ingesting files with the datasteward-kit"""
 
+import asyncio
 import json
 import os
 import shutil
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from pathlib import Path
 
 from fixtures.config import Config
-from fixtures.file import FileBatch, FileObject
-from fixtures.utils import temporary_file
+from fixtures.dsk import DskFixture
+from fixtures.file import FileBatch, FileObject, materialized_file
+from fixtures.ingest_latency import IngestLatencyTracker, latency_percentiles
+from fixtures.upload_timeline import UploadTimeline, read_upload_record
+from fixtures.utils import temporary_file, write_report
 from ghga_datasteward_kit.file_ingest import IngestConfig, alias_to_accession
 from metldata.submission_registry.submission_store import SubmissionStore
 from pytest import fixture
@@ -35,79 +42,142 @@ from .conftest import JointFixture, async_step, given, parse, scenarios, then, w
 
 scenarios("../features/12_upload_files.feature")
 
+INGEST_LATENCY_REPORT_NAME = "ingest_latency"
+
 
 def call_data_steward_kit_upload(
+    dsk: DskFixture,
     file_object: FileObject,
+    upload_config_path: Path,
+) -> subprocess.CompletedProcess:
+    """Call DSKit upload command to upload a file"""
+    return dsk.run(
+        [
+            "files",
+            "upload",
+            "--alias",
+            file_object.object_id,
+            "--input-path",
+            str(file_object.file_path),
+            "--config-path",
+            upload_config_path,
+        ],
+        timeout=60,
+    )
+
+
+def upload_files_concurrently(
+    dsk: DskFixture,
+    file_objects: list[FileObject],
     config: Config,
     file_metadata_dir: Path,
     token_path: Path,
     token: str,
-):
-    """Call DSKit upload command to upload a file"""
+    timeline: UploadTimeline,
+) -> None:
+    """Upload the given files individually with a bounded number of workers.
+
+    All uploads share one upload config and one token file, which are written
+    before the first and removed after the last upload, so that they are never
+    rewritten while other uploads are running. Files that are created on demand
+    are created by the workers right before their upload. Every upload is timed
+    and added to the given timeline. The results are checked after all uploads
+    have finished and the timeline has been written, so that all failures are
+    reported.
+    """
     upload_config_path = upload_config_as_file(
         config=config,
         file_metadata_dir=file_metadata_dir,
     )
 
-    with temporary_file(token_path, token) as _:
-        completed_upload = subprocess.run(  # nosec B607, B603
-            [
-                "ghga-datasteward-kit",
-                "files",
-                "upload",
-                "--alias",
-                file_object.object_id,
-                "--input-path",
-                str(file_object.file_path),
-                "--config-path",
-                upload_config_path,
-            ],
-            capture_output=True,
-            check=False,
-            encoding="utf-8",
-            text=True,
-            timeout=60,
-        )
-
-    print("STDERR")
-    print(completed_upload.stderr)
+    def upload(file_object: FileObject) -> subprocess.CompletedProcess:
+        with materialized_file(file_object, config) as upload_file:
+            start = time.time()
+            completed_upload = call_data_steward_kit_upload(
+                dsk=dsk, file_object=upload_file, upload_config_path=upload_config_path
+            )
+            timeline.add(
+                read_upload_record(
+                    alias=upload_file.object_id,
+                    mode="individual",
+                    start=start,
+                    end=time.time(),
+                    returncode=completed_upload.returncode,
+                    file_metadata_dir=file_metadata_dir,
+                    file_path=upload_file.file_path,
+                )
+            )
+            return completed_upload
 
-    assert not completed_upload.stdout
-    assert "ERROR" not in completed_upload.stderr
-    assert not completed_upload.returncode
+    with temporary_file(token_path, token) as _:
+        with ThreadPoolExecutor(max_workers=config.upload_workers) as executor:
+            completed_uploads = list(executor.map(upload, file_objects))
+    timeline.write()
+
+    failed_uploads = {
+        file_object.object_id: completed_upload.stderr
+        for file_object, completed_upload in zip(file_objects, completed_uploads)
+        if completed_upload.stdout
+        or "ERROR" in completed_upload.stderr
+        or completed_upload.returncode
+    }
+    for alias, stderr in failed_uploads.items():
+        print(f"STDERR of upload for {alias}")
+        print(stderr)
+    assert not failed_uploads, f"Uploads failed for {', '.join(failed_uploads)}"
 
 
 def call_data_steward_kit_batch_upload(
-    batch_files_tsv: Path,
+    dsk: DskFixture,
+    batch: FileBatch,
     config: Config,
     file_metadata_dir: Path,
     token_path: Path,
     token: str,
+    timeline: UploadTimeline,
 ):
-    """Call DSKit batch-upload command to upload listed files in TSV file"""
+    """Call DSKit batch-upload command to upload listed files in TSV file.
+
+    The datasteward-kit does not report when the upload of a single file starts,
+    so all uploads of the batch are added to the given timeline with the start
+    of the batch upload. The end of an upload is the time when its file metadata
+    was written, or the end of the batch upload if no file metadata was written.
+    """
     upload_config_path = upload_config_as_file(
         config=config, file_metadata_dir=file_metadata_dir
     )
 
     with temporary_file(token_path, token) as _:
-        completed_upload = subprocess.run(  # nosec B607, B603
+        start = time.time()
+        completed_upload = dsk.run(
             [
-                "ghga-datasteward-kit",
                 "files",
                 "batch-upload",
                 "--tsv",
-                str(batch_files_tsv),
+                str(batch.tsv_file),
                 "--config-path",
                 upload_config_path,
                 "--parallel-processes",
-                "2",
+                str(config.batch_upload_parallelism),
             ],
-            capture_output=True,
-            check=False,
-            encoding="utf-8",
-            text=True,
             timeout=180,
         )
+        end = time.time()
+
+    for file_object in batch.file_objects:
+        metadata_path = file_metadata_dir / f"{file_object.object_id}.json"
+        timeline.add(
+            read_upload_record(
+                alias=file_object.object_id,
+                mode="batch",
+                start=start,
+                end=metadata_path.stat().st_mtime if metadata_path.exists() else end,
+                returncode=completed_upload.returncode,
+                file_metadata_dir=file_metadata_dir,
+                file_path=file_object.file_path,
+            )
+        )
+    timeline.write()
 
     assert not completed_upload.stdout
     assert "ERROR" not in completed_upload.stderr
@@ -115,22 +185,17 @@ def call_data_steward_kit_batch_upload(
 
 
 def call_data_steward_kit_ingest(
-    ingest_config_path: str, token_path: Path, token: str
+    dsk: DskFixture, ingest_config_path: str, token_path: Path, token: str
 ) -> None:
     """Call DSKit file_ingest command to ingest file"""
     with temporary_file(token_path, token) as _:
-        completed_ingest = subprocess.run(  # nosec B607, B603
+        completed_ingest = dsk.run(
             [
-                "ghga-datasteward-kit",
                 "files",
                 "ingest-upload-metadata",
                 "--config-path",
                 ingest_config_path,
             ],
-            capture_output=True,
-            check=False,
-            encoding="utf-8",
-            text=True,
             timeout=10 * 60,
         )
 
@@ -142,6 +207,20 @@ def call_data_steward_kit_ingest(
     assert not completed_ingest.returncode
 
 
+def get_file_accessions(ingest_config: IngestConfig) -> set[str]:
+    """Get the accessions of all files with file metadata in the input directory."""
+    submission_store = SubmissionStore(config=ingest_config)
+    return {
+        alias_to_accession(
+            alias=metadata_file_path.stem,
+            map_fields=ingest_config.map_files_fields,
+            submission_store=submission_store,
+        )
+        for metadata_file_path in ingest_config.input_dir.iterdir()
+        if metadata_file_path.suffix == ".json"
+    }
+
+
 @given("the staging bucket is empty")
 @async_step
 async def staging_bucket_is_empty(fixtures: JointFixture):
@@ -166,14 +245,17 @@ def upload_files_individually(
     file_metadata_dir = fixtures.dsk.config.file_metadata_dir
     file_metadata_dir.mkdir(exist_ok=True)
 
-    for file_object in file_fixture:
-        call_data_steward_kit_upload(
-            file_object=file_object,
-            config=fixtures.config,
-            file_metadata_dir=file_metadata_dir,
-            token_path=fixtures.config.dsk_token_path,
-            token=fixtures.config.upload_token,
-        )
+    upload_files_concurrently(
+        dsk=fixtures.dsk,
+        file_objects=file_fixture,
+        config=fixtures.config,
+        file_metadata_dir=file_metadata_dir,
+        token_path=fixtures.config.dsk_token_path,
+        token=fixtures.config.upload_token,
+        timeline=UploadTimeline(
+            fixtures.config.report_dir, label=fixtures.config.upload_timeline_label
+        ),
+    )
     return file_fixture
 
 
@@ -187,13 +269,16 @@ def upload_files_as_batch(
     file_metadata_dir = fixtures.dsk.config.file_metadata_dir
     file_metadata_dir.mkdir(exist_ok=True)
 
-    tsv_file = batch_file_fixture.tsv_file
     call_data_steward_kit_batch_upload(
-        batch_files_tsv=tsv_file,
+        dsk=fixtures.dsk,
+        batch=batch_file_fixture,
         config=fixtures.config,
         file_metadata_dir=file_metadata_dir,
         token_path=fixtures.config.dsk_token_path,
         token=fixtures.config.upload_token,
+        timeline=UploadTimeline(
+            fixtures.config.report_dir, label=fixtures.config.upload_timeline_label
+        ),
     )
     return batch_file_fixture.file_objects
 
@@ -233,7 +318,16 @@ async def check_uploaded_files_in_storage(
 
 
 @when("the file metadata is ingested", target_fixture="ingest_config")
-def ingest_file_metadata(fixtures: JointFixture) -> IngestConfig:
+@async_step
+async def ingest_file_metadata(fixtures: JointFixture) -> IngestConfig:
+    """Ingest the file metadata and track the latency of the ingest.
+
+    Unless testing as a black box, the file registry and the permanent bucket
+    are polled while the ingest is running, and the time until each file appears
+    there is written to the ingest latency report together with percentiles.
+    Polling stops if the ingest fails. The step fails if some files are still
+    not in the permanent bucket `ingest_timeout` seconds after the ingest.
+    """
     ingest_config = IngestConfig(
         file_ingest_baseurl=fixtures.config.fis_url,
         file_ingest_pubkey=fixtures.config.fis_pubkey,
@@ -244,10 +338,54 @@ def ingest_file_metadata(fixtures: JointFixture) -> IngestConfig:
 
     ingest_config_path = ingest_config_as_file(config=ingest_config)
 
-    call_data_steward_kit_ingest(
-        ingest_config_path=ingest_config_path,
-        token_path=fixtures.config.dsk_token_path,
-        token=fixtures.config.upload_token,
+    if fixtures.config.use_api_gateway:
+        # black-box testing: cannot poll file registry and permanent bucket
+        call_data_steward_kit_ingest(
+            dsk=fixtures.dsk,
+            ingest_config_path=ingest_config_path,
+            token_path=fixtures.config.dsk_token_path,
+            token=fixtures.config.upload_token,
+        )
+        return ingest_config
+
+    tracker = IngestLatencyTracker(
+        mongo=fixtures.mongo,
+        s3=fixtures.s3,
+        config=fixtures.config,
+        accessions=get_file_accessions(ingest_config),
+    )
+    tracking = asyncio.ensure_future(tracker.track())
+    try:
+        await asyncio.to_thread(
+            call_data_steward_kit_ingest,
+            dsk=fixtures.dsk,
+            ingest_config_path=ingest_config_path,
+            token_path=fixtures.config.dsk_token_path,
+            token=fixtures.config.upload_token,
+        )
+    except BaseException:
+        tracking.cancel()
+        with suppress(asyncio.CancelledError):
+            await tracking
+        raise
+
+    tracker.set_timeout(fixtures.config.ingest_timeout)
+    latencies = await tracking
+    write_report(
+        fixtures.config.report_dir,
+        INGEST_LATENCY_REPORT_NAME,
+        {
+            "files": [latency._asdict() for latency in latencies],
+            "registered": latency_percentiles(
+                latency.registered for latency in latencies
+            ),
+            "stored": latency_percentiles(latency.stored for latency in latencies),
+        },
+    )
+    missing = [latency.accession for latency in latencies if latency.stored is None]
+    assert not missing, (
+        f"Files not in the permanent bucket after {fixtures.config.ingest_timeout}"
+        f" seconds: {', '.join(missing)}"
     )
 
     return ingest_config
@@ -260,18 +398,7 @@ def ingest_file_metadata(fixtures: JointFixture) -> IngestConfig:
 def check_metadata_documents(
     fixtures: JointFixture, ingest_config: IngestConfig
 ) -> set[str]:
-    accessions: set[str] = set()
-    file_metadata_dir = fixtures.dsk.config.file_metadata_dir
-    for metadata_file_path in file_metadata_dir.iterdir():
-        if metadata_file_path.suffix == ".json":
-            alias = metadata_file_path.stem
-            accession = alias_to_accession(
-                alias=alias,
-                map_fields=ingest_config.map_files_fields,
-                submission_store=SubmissionStore(config=ingest_config),
-            )
-            accessions.add(accession)
-
+    accessions = get_file_accessions(ingest_config)
     assert accessions
 
     if fixtures.config.use_api_gateway:
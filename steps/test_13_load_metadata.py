@@ -16,9 +16,9 @@
 
 """Step definitions for loading metadata artifacts with the datasteward-kit"""
 
-import subprocess
 from collections import Counter
 
+from fixtures.load_manifest import LoadManifest
 from fixtures.utils import temporary_file
 from ghga_datasteward_kit.loading import LoadConfig
 
@@ -31,35 +31,32 @@ scenarios("../features/13_load_metadata.feature")
 
 @when("metadata is loaded into the system")
 def run_the_load_command(fixtures: JointFixture):
-    load_config_path = load_config_as_file(
-        LoadConfig(
-            event_store_path=fixtures.dsk.config.event_store,
-            artifact_topic_prefix="artifact",
-            artifact_types=["embedded_public", "stats_public"],
-            loader_api_root=fixtures.config.metldata_url,
-        )
+    load_config = LoadConfig(
+        event_store_path=fixtures.dsk.config.event_store,
+        artifact_topic_prefix="artifact",
+        artifact_types=["embedded_public", "stats_public"],
+        loader_api_root=fixtures.config.metldata_url,
     )
+    manifest = None
+    if fixtures.config.incremental_load:
+        manifest = LoadManifest(fixtures.dsk.config.load_manifest, load_config)
+        if not manifest.needs_load():
+            return  # the loaded artifacts are still up to date
+    load_config_path = load_config_as_file(load_config)
 
     upload_token = fixtures.config.upload_token
     with temporary_file(fixtures.config.dsk_token_path, upload_token):
-        completed_upload = subprocess.run(  # nosec B607, B603
-            [
-                "ghga-datasteward-kit",
-                "load",
-                "--config-path",
-                load_config_path,
-            ],
-            capture_output=True,
-            check=False,
-            encoding="utf-8",
-            text=True,
-            timeout=10 * 60,
+        completed_upload = fixtures.dsk.run(
+            ["load", "--config-path", load_config_path], timeout=10 * 60
         )
 
         assert not completed_upload.stdout
         assert not completed_upload.stderr
         assert not completed_upload.returncode
 
+    if manifest:
+        manifest.save()
+
 
 @then("the stats for the datasets exist in the database")
 def check_stats_in_metldata_database(config: Config, mongo: MongoFixture):
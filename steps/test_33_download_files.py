@@ -15,9 +15,10 @@
 
 """Step definitions for downloading files with the GHGA connector"""
 
-import os
 import subprocess
 
+from fixtures.utils import write_report
+
 from .conftest import (
     Config,
     ConnectorFixture,
@@ -29,7 +30,7 @@ from .conftest import (
     then,
     when,
 )
-from .utils import verify_named_file
+from .utils import ExpectedFile, list_file_sizes, verify_named_files
 
 scenarios("../features/33_download_files.feature")
 
@@ -98,9 +99,10 @@ def files_are_downloaded(fixtures: JointFixture, file_scope: str):
 
     download_dir = fixtures.connector.config.download_dir
 
-    file_count = sum(1 for item in os.listdir(download_dir) if not os.path.isdir(item))
-    assert len(files) == file_count
+    file_sizes = list_file_sizes(download_dir)
+    assert len(files) == len(file_sizes)
 
+    expected_files = []
     for file_ in files:
         file_id = file_["id"]
         file_extension = file_["extension"]
@@ -108,12 +110,14 @@ def files_are_downloaded(fixtures: JointFixture, file_scope: str):
         assert file_id.startswith("GHGAF")
         assert file_id in dataset_file_accessions
 
-        verify_named_file(
-            target_dir=download_dir,
-            extension=file_extension,
-            name=file_id,
-            encrypted=True,
-        )
+        expected_files.append(ExpectedFile(name=file_id, extension=file_extension))
+
+    verify_named_files(
+        target_dir=download_dir,
+        files=expected_files,
+        encrypted=True,
+        file_sizes=file_sizes,
+    )
 
     return files
 
@@ -153,6 +157,7 @@ def files_have_been_decrypted(
     dataset = datasets[dataset_alias]
     dataset_files = {file["accession"]: file for file in dataset["files"].values()}
 
+    expected_files = []
     for file_ in downloaded_files:
         file_id = file_["id"]
         file_extension = file_["extension"]
@@ -161,11 +166,30 @@ def files_have_been_decrypted(
         checksum = dataset_file["checksum"]
         size = dataset_file["size"]
 
-        verify_named_file(
-            target_dir=fixtures.connector.config.download_dir,
-            extension=file_extension,
-            name=file_id,
-            encrypted=False,
-            checksum=checksum,
-            size_in_bytes=size,
+        expected_files.append(
+            ExpectedFile(
+                name=file_id,
+                extension=file_extension,
+                checksum=checksum,
+                size_in_bytes=size,
+            )
         )
+
+    config = fixtures.config
+    verifications = verify_named_files(
+        target_dir=fixtures.connector.config.download_dir,
+        files=expected_files,
+        encrypted=False,
+        chunk_size=config.checksum_chunk_size,
+        use_mmap=config.checksum_use_mmap,
+        max_workers=config.verification_workers,
+    )
+
+    write_report(
+        config.report_dir,
+        "download_verification",
+        [
+            {**verification._asdict(), "throughput_mb_s": verification.throughput}
+            for verification in verifications
+        ],
+    )
@@ -17,7 +17,8 @@
 """Step definitions for deleting datasets"""
 
 import subprocess
-from pathlib import Path
+
+from fixtures.event_store import EventStoreIndex
 
 from .conftest import (
     Config,
@@ -38,34 +39,24 @@ from .utils import get_dataset_overview, search_dataset_rpc
 scenarios("../features/40_delete_datasets.feature")
 
 
-def is_dataset_a_and_b(event_file: Path) -> bool:
-    """Check whether the given event file is a submission for a complete dataset."""
-    event = open(event_file).read()
-    return (
-        '"type_": "source_event"' in event
-        and '"submission_id":' in event
-        and '"title": "The complete' in event
-    )
+COMPLETE_DATASET_TITLES = ("The complete-A dataset", "The complete-B dataset")
 
 
 @when("the artifacts for the complete datasets are removed from the event store")
 def delete_artifacts_for_complete_datasets(fixtures: JointFixture):
-    event_path = fixtures.dsk.config.event_store
-    source_event = None
-    for event_file in (event_path / "source_events").glob("*.json"):
-        if is_dataset_a_and_b(event_file):
-            assert not source_event
-            source_event = event_file.name
-    assert source_event
-    num_artifact_types = num_deleted_artifacts = 0
-    for artifact_dir in event_path.glob("artifact*"):
-        if not artifact_dir.is_dir():
-            continue
-        num_artifact_types += 1
-        artifact_path = artifact_dir / source_event
-        if artifact_path.exists():
-            artifact_path.unlink()
-            num_deleted_artifacts += 1
+    event_store_index = EventStoreIndex(
+        fixtures.dsk.config.event_store, fixtures.dsk.config.event_store_index
+    )
+    source_events = set.union(
+        *(event_store_index.find(title=title) for title in COMPLETE_DATASET_TITLES)
+    )
+    assert len(source_events) == 1
+    source_event = source_events.pop()
+    num_artifact_types = len(event_store_index.artifact_topics)
+    artifact_paths = event_store_index.artifact_paths(source_event)
+    for artifact_path in artifact_paths:
+        artifact_path.unlink()
+    num_deleted_artifacts = len(artifact_paths)
     assert num_artifact_types == 5
     if num_deleted_artifacts:  # allow that they have already been deleted
         assert num_deleted_artifacts == num_artifact_types
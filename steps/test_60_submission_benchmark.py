@@ -0,0 +1,151 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Step definitions for benchmarking the metadata submission"""
+
+import math
+import shutil
+from typing import NamedTuple, Optional
+
+from fixtures.benchmark import dir_size, measure_process
+from fixtures.dsk import DskConfig, DskFixture
+from fixtures.dsk_runner import DSK_COMMAND
+from fixtures.metadata_generator import MetadataGenerator, MetadataScale
+from fixtures.scratch import get_scratch_dir
+from fixtures.utils import write_report
+
+from .conftest import JointFixture, scenarios, then, when
+
+scenarios("../features/60_submission_benchmark.feature")
+
+REPORT_NAME = "submission_benchmark"
+
+
+class SubmissionMeasurement(NamedTuple):
+    """Resource usage of the submission of generated metadata"""
+
+    datasets: int
+    files: int
+    metadata_size: int
+    returncode: int
+    stderr: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss: int
+    submissions: int
+    submission_store_size: int
+
+
+def benchmark_submission(
+    datasets: int, fixtures: JointFixture, timeout: int = 2 * 60 * 60
+) -> SubmissionMeasurement:
+    """Submit generated metadata with the given number of datasets.
+
+    The submission is run in a fresh submission registry in a separate process,
+    so that its peak memory usage can be measured. The submission registry
+    is removed afterwards.
+    """
+    work_dir = get_scratch_dir(fixtures.config) / "benchmark" / f"{datasets}_datasets"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    dsk = DskFixture(config=DskConfig.in_dir(work_dir))
+    dsk.reset_work_dir()
+    try:
+        scale = MetadataScale(datasets=datasets)
+        metadata_path = work_dir / "metadata.json"
+        MetadataGenerator(scale).write(metadata_path)
+
+        measurement = measure_process(
+            [
+                DSK_COMMAND,
+                "metadata",
+                "submit",
+                "--submission-title",
+                f"Benchmark Submission with {datasets} datasets",
+                "--submission-description",
+                "Generated metadata for benchmarking the submission",
+                "--metadata-path",
+                str(metadata_path),
+                "--config-path",
+                str(dsk.config.metadata_config_path),
+            ],
+            cwd=dsk.config.submission_registry,
+            timeout=timeout,
+        )
+        submission_store = dsk.config.submission_store
+        return SubmissionMeasurement(
+            datasets=datasets,
+            files=scale.num_files,
+            metadata_size=metadata_path.stat().st_size,
+            returncode=measurement.returncode,
+            stderr=measurement.stderr,
+            wall_seconds=measurement.wall_seconds,
+            cpu_seconds=measurement.cpu_seconds,
+            peak_rss=measurement.peak_rss,
+            submissions=len(list(submission_store.glob("*.json"))),
+            submission_store_size=dir_size(submission_store),
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+@when(
+    "generated metadata of increasing size is submitted",
+    target_fixture="submission_measurements",
+)
+def submit_generated_metadata(fixtures: JointFixture) -> list[SubmissionMeasurement]:
+    return [
+        benchmark_submission(datasets, fixtures)
+        for datasets in sorted(fixtures.config.benchmark_submission_sizes)
+    ]
+
+
+@then("all generated submissions are in their submission stores")
+def check_generated_submissions(submission_measurements: list[SubmissionMeasurement]):
+    for measurement in submission_measurements:
+        datasets = measurement.datasets
+        assert not measurement.returncode, f"{datasets} datasets: {measurement.stderr}"
+        assert "ERROR" not in measurement.stderr
+        assert measurement.submissions == 1
+        assert measurement.submission_store_size
+
+
+@then("the submission benchmark report is written")
+def write_submission_benchmark_report(
+    fixtures: JointFixture, submission_measurements: list[SubmissionMeasurement]
+):
+    """Write the measurements as a curve over the number of datasets.
+
+    The scaling exponent relates the growth of the wall time to the growth
+    of the submission compared to the previous size, so that it is close to one
+    if the submission scales linearly and close to two if it scales quadratically.
+    """
+    curve = []
+    previous: Optional[SubmissionMeasurement] = None
+    for measurement in submission_measurements:
+        point = measurement._asdict()
+        del point["stderr"]
+        point["seconds_per_dataset"] = measurement.wall_seconds / measurement.datasets
+        point["scaling_exponent"] = (
+            math.log(measurement.wall_seconds / previous.wall_seconds)
+            / math.log(measurement.datasets / previous.datasets)
+            if previous and measurement.datasets > previous.datasets
+            else None
+        )
+        curve.append(point)
+        previous = measurement
+
+    report_path = write_report(fixtures.config.report_dir, REPORT_NAME, curve)
+    assert report_path.exists()
@@ -0,0 +1,195 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Step definitions for benchmarking the parallelism of the batch upload"""
+
+import shutil
+from typing import Any, NamedTuple, Optional
+
+from fixtures.benchmark import measure_process
+from fixtures.dsk_runner import DSK_COMMAND
+from fixtures.file import FileBatch
+from fixtures.scratch import get_scratch_dir
+from fixtures.utils import temporary_file, write_report
+
+from steps.utils import upload_config_as_file
+
+from .conftest import JointFixture, async_step, scenarios, then, when
+
+scenarios("../features/61_batch_upload_benchmark.feature")
+
+REPORT_NAME = "batch_upload_benchmark"
+
+# levels reaching this share of the best throughput are considered equally good
+THROUGHPUT_TOLERANCE = 0.95
+
+
+class BatchUploadMeasurement(NamedTuple):
+    """Throughput and resource usage of a batch upload"""
+
+    parallelism: int
+    files: int
+    uploaded_files: int
+    size_in_bytes: int
+    wall_seconds: float
+    cpu_seconds: float  # including all upload processes
+    peak_rss: int  # of the largest process
+
+    @property
+    def throughput(self) -> float:
+        """Get the aggregate throughput of the successful uploads in MB/s."""
+        if not self.wall_seconds or not self.files:
+            return 0.0
+        uploaded_size = self.size_in_bytes * self.uploaded_files / self.files
+        return uploaded_size / self.wall_seconds / 1e6
+
+    @property
+    def error_rate(self) -> float:
+        """Get the share of files that could not be uploaded."""
+        return 1 - self.uploaded_files / self.files if self.files else 0.0
+
+    @property
+    def cpu_usage(self) -> float:
+        """Get the average number of busy CPU cores during the upload."""
+        return self.cpu_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def benchmark_batch_upload(
+    parallelism: int,
+    batch: FileBatch,
+    fixtures: JointFixture,
+    timeout: int = 60 * 60,
+) -> BatchUploadMeasurement:
+    """Upload the given batch with the given number of parallel processes.
+
+    Every run writes its file metadata into a fresh directory, because the
+    batch upload skips all files for which file metadata already exists.
+    The upload is run in a separate process, so that its resource usage
+    including the upload processes it starts can be measured.
+    """
+    config = fixtures.config
+    work_dir = get_scratch_dir(config) / "benchmark" / f"batch_upload_{parallelism}"
+    file_metadata_dir = work_dir / "file_metadata"
+    file_metadata_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        upload_config_path = upload_config_as_file(
+            config=config, file_metadata_dir=file_metadata_dir
+        )
+        measurement = measure_process(
+            [
+                DSK_COMMAND,
+                "files",
+                "batch-upload",
+                "--tsv",
+                str(batch.tsv_file),
+                "--config-path",
+                str(upload_config_path),
+                "--parallel-processes",
+                str(parallelism),
+            ],
+            timeout=timeout,
+        )
+        return BatchUploadMeasurement(
+            parallelism=parallelism,
+            files=len(batch.file_objects),
+            uploaded_files=len(list(file_metadata_dir.glob("*.json"))),
+            size_in_bytes=sum(
+                file_object.file_path.stat().st_size
+                for file_object in batch.file_objects
+            ),
+            wall_seconds=measurement.wall_seconds,
+            cpu_seconds=measurement.cpu_seconds,
+            peak_rss=measurement.peak_rss,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def recommend_parallelism(
+    measurements: list[BatchUploadMeasurement],
+) -> Optional[int]:
+    """Recommend the number of parallel processes for the batch upload.
+
+    Only levels without failed uploads are considered. Among the levels that
+    come close to the best throughput, the lowest one is recommended, since
+    additional processes only cost resources without speeding up the upload.
+    """
+    measurements = [
+        measurement for measurement in measurements if not measurement.error_rate
+    ]
+    if not measurements:
+        return None
+    best_throughput = max(measurement.throughput for measurement in measurements)
+    return min(
+        measurement.parallelism
+        for measurement in measurements
+        if measurement.throughput >= THROUGHPUT_TOLERANCE * best_throughput
+    )
+
+
+@when(
+    "the batch of files is uploaded with increasing parallelism",
+    target_fixture="batch_upload_measurements",
+)
+@async_step
+async def upload_batch_with_increasing_parallelism(
+    fixtures: JointFixture, batch_file_fixture: FileBatch
+) -> list[BatchUploadMeasurement]:
+    """Upload the batch once for every level and empty the staging bucket after."""
+    config = fixtures.config
+    try:
+        with temporary_file(config.dsk_token_path, config.upload_token):
+            return [
+                benchmark_batch_upload(parallelism, batch_file_fixture, fixtures)
+                for parallelism in sorted(config.benchmark_batch_parallelism)
+            ]
+    finally:
+        await fixtures.s3.empty_given_buckets([config.staging_bucket])
+
+
+@then(
+    "the batch upload benchmark report is written",
+    target_fixture="batch_upload_report",
+)
+def write_batch_upload_benchmark_report(
+    fixtures: JointFixture, batch_upload_measurements: list[BatchUploadMeasurement]
+) -> dict[str, Any]:
+    report = {
+        "levels": [
+            {
+                **measurement._asdict(),
+                "throughput_mb_s": measurement.throughput,
+                "error_rate": measurement.error_rate,
+                "cpu_usage": measurement.cpu_usage,
+            }
+            for measurement in batch_upload_measurements
+        ],
+        "recommended_parallelism": recommend_parallelism(batch_upload_measurements),
+    }
+    report_path = write_report(fixtures.config.report_dir, REPORT_NAME, report)
+    assert report_path.exists()
+    return report
+
+
+@then("a parallelism for the batch upload is recommended")
+def check_recommended_parallelism(batch_upload_report: dict[str, Any]):
+    levels = batch_upload_report["levels"]
+    assert batch_upload_report["recommended_parallelism"], (
+        "All levels had failed uploads: "
+        + ", ".join(
+            f"{level['parallelism']}: {level['error_rate']:.0%}" for level in levels
+        )
+    )
@@ -0,0 +1,209 @@
+# Copyright 2021 - 2023 Universität Tübingen, DKFZ, EMBL, and Universität zu Köln
+# for the German Human Genome-Phenome Archive (GHGA)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Step definitions for benchmarking the part size of file uploads"""
+
+import json
+import math
+import shutil
+from typing import NamedTuple, Optional
+
+from fixtures.benchmark import measure_process
+from fixtures.dsk_runner import DSK_COMMAND
+from fixtures.file import FileObject, check_file_space, create_named_file
+from fixtures.scratch import get_scratch_dir
+from fixtures.utils import temporary_file, write_report
+
+from steps.utils import upload_config_as_file
+
+from .conftest import JointFixture, async_step, scenarios, then, when
+
+scenarios("../features/62_part_size_benchmark.feature")
+
+REPORT_NAME = "part_size_benchmark"
+BENCHMARK_FILE_NAME = "part_size_benchmark.bin"
+
+
+class PartSizeMeasurement(NamedTuple):
+    """Throughput and resource usage of an upload with a given part size"""
+
+    requested_part_size: int  # in MiB
+    part_size: Optional[int]  # in bytes, as adjusted by the datasteward-kit
+    size_in_bytes: int
+    encrypted_size: Optional[int]
+    returncode: int
+    stderr: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss: int
+
+    @property
+    def num_parts(self) -> Optional[int]:
+        """Get the number of parts of the encrypted file."""
+        if not self.part_size or self.encrypted_size is None:
+            return None
+        return math.ceil(self.encrypted_size / self.part_size)
+
+    @property
+    def num_requests(self) -> Optional[int]:
+        """Get the number of S3 requests for the upload and its verification.
+
+        Every part is uploaded and downloaded once, and two more requests
+        are needed to create and to complete the multipart upload.
+        """
+        num_parts = self.num_parts
+        return None if num_parts is None else 2 * num_parts + 2
+
+    @property
+    def throughput(self) -> float:
+        """Get the throughput of the upload including its verification in MB/s."""
+        if self.returncode or not self.wall_seconds:
+            return 0.0
+        return self.size_in_bytes / self.wall_seconds / 1e6
+
+
+def benchmark_part_size(
+    part_size: int,
+    file_object: FileObject,
+    fixtures: JointFixture,
+    timeout: int = 60 * 60,
+) -> PartSizeMeasurement:
+    """Upload the given file with the given part size in MiB.
+
+    The upload is run in a separate process, so that its peak memory usage
+    can be measured. The part size used by the datasteward-kit after adjusting
+    the requested part size and the size of the encrypted file are taken from
+    the file metadata of the upload, which is written into a fresh directory.
+    """
+    config = fixtures.config
+    work_dir = get_scratch_dir(config) / "benchmark" / f"part_size_{part_size}"
+    file_metadata_dir = work_dir / "file_metadata"
+    file_metadata_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        upload_config_path = upload_config_as_file(
+            config=config, file_metadata_dir=file_metadata_dir, part_size=part_size
+        )
+        measurement = measure_process(
+            [
+                DSK_COMMAND,
+                "files",
+                "upload",
+                "--alias",
+                file_object.object_id,
+                "--input-path",
+                str(file_object.file_path),
+                "--config-path",
+                str(upload_config_path),
+            ],
+            timeout=timeout,
+        )
+        metadata_path = file_metadata_dir / f"{file_object.object_id}.json"
+        file_metadata = (
+            json.loads(metadata_path.read_text()) if metadata_path.exists() else {}
+        )
+        used_part_size = file_metadata.get("Part Size")
+        encrypted_size = file_metadata.get("Encrypted file size")
+        return PartSizeMeasurement(
+            requested_part_size=part_size,
+            part_size=(
+                int(used_part_size.rpartition(" MiB")[0]) * 1024**2
+                if used_part_size
+                else None
+            ),
+            size_in_bytes=file_object.file_path.stat().st_size,
+            encrypted_size=None if encrypted_size is None else int(encrypted_size),
+            returncode=measurement.returncode,
+            stderr=measurement.stderr,
+            wall_seconds=measurement.wall_seconds,
+            cpu_seconds=measurement.cpu_seconds,
+            peak_rss=measurement.peak_rss,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_distinct_part_sizes(
+    file_object: FileObject, fixtures: JointFixture
+) -> list[PartSizeMeasurement]:
+    """Upload the given file with all configured part sizes in ascending order.
+
+    The datasteward-kit raises part sizes below 5 MiB or too small for the file,
+    and the adjusted part size never decreases when the requested one increases.
+    Part sizes that do not exceed the part size used in the previous upload
+    would therefore repeat the same upload and are skipped.
+    """
+    measurements: list[PartSizeMeasurement] = []
+    for part_size in sorted(set(fixtures.config.benchmark_part_sizes)):
+        used_part_size = measurements[-1].part_size if measurements else None
+        if used_part_size and part_size * 1024**2 <= used_part_size:
+            continue
+        measurements.append(benchmark_part_size(part_size, file_object, fixtures))
+    return measurements
+
+
+@when(
+    "the same file is uploaded with different part sizes",
+    target_fixture="part_size_measurements",
+)
+@async_step
+async def upload_file_with_different_part_sizes(
+    fixtures: JointFixture,
+) -> list[PartSizeMeasurement]:
+    """Upload a generated file with every part size and clean up after."""
+    config = fixtures.config
+    target_dir = get_scratch_dir(config) / "benchmark" / "part_size"
+    target_dir.mkdir(parents=True, exist_ok=True)
+    file_size = config.benchmark_upload_file_size
+    check_file_space(target_dir, config, [{"size": file_size}])
+    try:
+        file_object = create_named_file(
+            target_dir=target_dir,
+            config=config,
+            name=BENCHMARK_FILE_NAME,
+            file_size=file_size,
+        )
+        with temporary_file(config.dsk_token_path, config.upload_token):
+            return benchmark_distinct_part_sizes(file_object, fixtures)
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+        await fixtures.s3.empty_given_buckets([config.staging_bucket])
+
+
+@then("the part size benchmark report is written")
+def write_part_size_benchmark_report(
+    fixtures: JointFixture, part_size_measurements: list[PartSizeMeasurement]
+):
+    report = []
+    for measurement in part_size_measurements:
+        run = measurement._asdict()
+        del run["stderr"]
+        run["num_parts"] = measurement.num_parts
+        run["num_requests"] = measurement.num_requests
+        run["throughput_mb_s"] = measurement.throughput
+        report.append(run)
+    report_path = write_report(fixtures.config.report_dir, REPORT_NAME, report)
+    assert report_path.exists()
+
+
+@then("the file was uploaded with every part size")
+def check_uploads_with_every_part_size(
+    part_size_measurements: list[PartSizeMeasurement],
+):
+    for measurement in part_size_measurements:
+        part_size = measurement.requested_part_size
+        assert not measurement.returncode, f"{part_size} MiB: {measurement.stderr}"
+        assert "ERROR" not in measurement.stderr
+        assert measurement.part_size, f"{part_size} MiB: no file metadata"
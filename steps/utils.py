@@ -16,11 +16,15 @@
 """Utilities used in step functions"""
 
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Optional
+from time import perf_counter
+from typing import NamedTuple, Optional
 
 from fixtures import Config, JointFixture
-from fixtures.utils import calculate_checksum, write_data_to_yaml
+from fixtures.utils import calculate_file_checksum, write_data_to_yaml
 from ghga_datasteward_kit.file_ingest import IngestConfig
 from ghga_datasteward_kit.loading import LoadConfig
 from hexkit.custom_types import JsonObject
@@ -62,14 +66,19 @@ def load_config_as_file(config: LoadConfig):
     return write_data_to_yaml(data=load_config)
 
 
-def upload_config_as_file(config: Config, file_metadata_dir: Path):
-    """Create upload config file for data steward kit files upload"""
+def upload_config_as_file(
+    config: Config, file_metadata_dir: Path, part_size: Optional[int] = None
+):
+    """Create upload config file for data steward kit files upload
+
+    The part size in MiB defaults to the upload part size of the test bed config.
+    """
     upload_config = {
         "s3_endpoint_url": config.s3_endpoint_url,
         "s3_access_key_id": config.s3_access_key_id,
         "s3_secret_access_key": config.s3_secret_access_key.get_secret_value(),
         "bucket_id": config.staging_bucket,
-        "part_size": str(config.upload_part_size),
+        "part_size": str(part_size or config.upload_part_size),
         "output_dir": str(file_metadata_dir),
         "secret_ingest_baseurl": config.fis_url,
         "secret_ingest_pubkey": config.fis_pubkey,
@@ -86,38 +95,97 @@ def get_ext_char(file_path: Path):
     return first_char
 
 
-def verify_named_file(
-    target_dir: Path,
-    name: str,
-    extension: str,
-    encrypted=False,
-    checksum: Optional[str] = None,
-    size_in_bytes: Optional[int] = None,
-) -> None:
-    """Verify a file with given parameters"""
-    file_path = target_dir
-    name += extension
-    if encrypted:
-        name += ".c4gh"
+class ExpectedFile(NamedTuple):
+    """A file that is expected to exist in a directory"""
 
-    matching = [path for path in file_path.iterdir() if path.name == name]
-    assert len(matching) == 1, f"File {name} was not found"
+    name: str
+    extension: str
+    checksum: Optional[str] = None
+    size_in_bytes: Optional[int] = None
 
-    if not encrypted:
-        if size_in_bytes is None:
-            raise ValueError("size_in_bytes must be provided for non-encrypted files")
 
-        if checksum is None:
-            raise ValueError("checksum must be provided for non-encrypted files")
+class FileVerification(NamedTuple):
+    """The result of verifying the checksum of a file"""
+
+    name: str
+    size_in_bytes: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Get the throughput of the checksum computation in MB/s."""
+        return self.size_in_bytes / self.seconds / 1e6 if self.seconds else 0.0
+
 
-        file_path = matching[0]
+def list_file_sizes(target_dir: Path) -> dict[str, int]:
+    """Get names and sizes of all regular files in a directory in a single scan."""
+    with os.scandir(target_dir) as entries:
+        return {
+            entry.name: entry.stat().st_size for entry in entries if entry.is_file()
+        }
 
-        file_size_in_bytes = file_path.stat().st_size
-        assert file_size_in_bytes == size_in_bytes
 
-        with open(file_path, "rb") as file:
-            file_checksum = calculate_checksum(file.read())
-        assert file_checksum == checksum
+def timed_file_checksum(
+    file_path: Path, chunk_size: int, use_mmap: bool
+) -> tuple[str, float]:
+    """Compute the checksum of a file and measure the time needed for this."""
+    start = perf_counter()
+    checksum = calculate_file_checksum(
+        file_path, chunk_size=chunk_size, use_mmap=use_mmap
+    )
+    return checksum, perf_counter() - start
+
+
+def verify_named_files(
+    target_dir: Path,
+    files: list[ExpectedFile],
+    encrypted=False,
+    file_sizes: Optional[dict[str, int]] = None,
+    chunk_size: int = 8 * 1024**2,
+    use_mmap: bool = False,
+    max_workers: Optional[int] = None,
+) -> list[FileVerification]:
+    """Verify files with given parameters in the target directory
+
+    The directory is scanned only once, unless the file sizes have already been
+    passed. Encrypted files are only checked for existence. For other files, the
+    sizes and checksums are verified. The checksums are computed in a process pool,
+    streaming the files in chunks of the given size, optionally using a memory map.
+    Returns the verifications including the time needed for each checksum.
+    """
+    if file_sizes is None:
+        file_sizes = list_file_sizes(target_dir)
+
+    names = []
+    for file_ in files:
+        name = file_.name + file_.extension
+        if encrypted:
+            name += ".c4gh"
+        assert name in file_sizes, f"File {name} was not found"
+        names.append(name)
+
+    if encrypted:
+        return []
+
+    for name, file_ in zip(names, files):
+        if file_.size_in_bytes is None:
+            raise ValueError("size_in_bytes must be provided for non-encrypted files")
+        if file_.checksum is None:
+            raise ValueError("checksum must be provided for non-encrypted files")
+        assert file_sizes[name] == file_.size_in_bytes
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            timed_file_checksum,
+            [target_dir / name for name in names],
+            repeat(chunk_size),
+            repeat(use_mmap),
+        )
+        verifications = []
+        for name, file_, (checksum, seconds) in zip(names, files, results):
+            assert checksum == file_.checksum, f"File {name} has a wrong checksum"
+            verifications.append(FileVerification(name, file_sizes[name], seconds))
+    return verifications
 
 
 def search_dataset_rpc(